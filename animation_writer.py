@@ -0,0 +1,139 @@
+import itertools
+import os
+import shutil
+import subprocess
+
+import numpy as np
+
+ANIMATION_FORMATS = ('gif', 'webp', 'mp4')
+GIF_ADAPTIVE_COLORS = 192  # Palette entries taken from the first frame, the other 64 form a coarse RGB cube
+
+
+def write_animation(path, frames, fps=2.0, loop=0):
+    """Write RGB frames to a GIF, WebP or MP4 file (chosen by extension) as they are produced.
+
+    frames may be any iterable, e.g. the render_frames generator. GIF, and WebP and MP4 through
+    ffmpeg, encode and release each frame before the next one is taken, so memory stays at a few
+    frames regardless of the length of the sweep. MP4 needs ffmpeg on the PATH; WebP falls back to
+    Pillow without it, which holds all frames in memory. Raises ValueError if frames is empty.
+    Returns the number of frames written.
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension == 'gif':
+        return write_gif(path, frames, fps, loop)
+    if extension not in ('webp', 'mp4'):
+        raise ValueError(f"Unsupported animation format '{extension}', use one of {', '.join(ANIMATION_FORMATS)}")
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is not None:
+        return write_with_ffmpeg(ffmpeg, path, frames, fps, loop)
+    if extension == 'mp4':
+        raise RuntimeError("MP4 output needs ffmpeg, which was not found on the PATH")
+    print("ffmpeg not found, writing the WebP animation with Pillow instead, which keeps all frames in memory")
+    return write_webp_with_pillow(path, frames, fps, loop)
+
+
+def write_gif(path, frames, fps, loop=0):
+    """Stream frames into a GIF, quantizing every frame to one shared palette.
+
+    A shared global palette keeps colors stable between frames and lets each frame be written
+    to the file right away instead of collecting all frames for Image.save(save_all=True).
+    """
+    from PIL import GifImagePlugin, Image
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No frames to write")
+
+    duration = 1000 / fps
+    count = 0
+    with open(path, 'wb') as f:
+        palette_image = None
+        for frame in itertools.chain([first], frames):
+            img = Image.fromarray(np.asarray(frame)).convert('RGB')
+            if palette_image is None:
+                palette_image = create_gif_palette(img)
+                header, _ = GifImagePlugin.getheader(palette_image.copy(), info={'loop': loop, 'optimize': False})
+                for chunk in header:
+                    f.write(chunk)
+            quantized = img.quantize(palette=palette_image, dither=Image.Dither.FLOYDSTEINBERG)
+            for chunk in GifImagePlugin.getdata(quantized, duration=duration):
+                f.write(chunk)
+            count += 1
+        f.write(b';')  # GIF trailer
+    return count
+
+
+def create_gif_palette(img):
+    """Build the shared 256 color palette: the main colors of the first frame plus a coarse RGB cube.
+
+    The cube gives colors that only appear in later frames a reasonably close entry.
+    """
+    from PIL import Image
+
+    adaptive = img.quantize(colors=GIF_ADAPTIVE_COLORS, method=Image.Quantize.MEDIANCUT).getpalette()
+    adaptive = (adaptive + [0, 0, 0] * GIF_ADAPTIVE_COLORS)[:3 * GIF_ADAPTIVE_COLORS]
+    levels = [0, 85, 170, 255]
+    cube = [channel for r in levels for g in levels for b in levels for channel in (r, g, b)]
+    palette_image = Image.new('P', (1, 1))
+    palette_image.putpalette(adaptive + cube)
+    return palette_image
+
+
+def write_with_ffmpeg(ffmpeg, path, frames, fps, loop=0):
+    """Pipe raw RGB frames into an ffmpeg process that encodes them to WebP or MP4."""
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No frames to write")
+    height, width = np.asarray(first).shape[:2]
+
+    command = [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', f'{width}x{height}', '-r', str(fps), '-i', '-']
+    if path.lower().endswith('.mp4'):
+        # yuv420p for compatibility with common players, which needs even frame sizes
+        command += ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2']
+    else:
+        command += ['-c:v', 'libwebp', '-lossless', '0', '-loop', str(loop)]
+    command.append(path)
+
+    count = 0
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        for frame in itertools.chain([first], frames):
+            process.stdin.write(np.ascontiguousarray(frame, dtype=np.uint8).tobytes())
+            count += 1
+    finally:
+        process.stdin.close()
+        stderr = process.stderr.read()
+        process.wait()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to write '{path}': {stderr.decode(errors='replace').strip()}")
+    return count
+
+
+def write_webp_with_pillow(path, frames, fps, loop=0):
+    """Encode an animated WebP with Pillow.
+
+    Not streaming: Pillow collects all appended frames in a list before encoding, so the whole
+    sweep is held in memory. Only used when ffmpeg is not available.
+    """
+    from PIL import Image
+
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
+        raise ValueError("No frames to write")
+    count = 1
+
+    def remaining_images():
+        nonlocal count
+        for frame in frames:
+            count += 1
+            yield Image.fromarray(np.asarray(frame))
+
+    Image.fromarray(np.asarray(first)).save(path, format='WEBP', save_all=True, append_images=remaining_images(),
+                                            duration=int(1000 / fps), loop=loop)
+    return count
+
@@ -1,25 +1,15 @@
 import os
 import sqlite3
 import pandas as pd
-import re
 import logging
 
+from sample_info import extract_dust_number_and_washed
+
 # Configure logging
 logging.basicConfig(filename='../outputs/samples_overview.log', level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def extract_dust_number_and_washed(name):
-    # Extract dust number using regex
-    dust_number_match = re.search(r'EAFD_(\d+[_\d]*)', name)
-    dust_number = dust_number_match.group(1).split('_')[0] if dust_number_match else ''
-
-    # Determine washed status
-    washed = 0 if 'W' in name else 1
-
-    return dust_number, washed
-
-
 def read_measurement_series_meta_info(db_path, samples_list):
     # Connect to the SQLite database
     conn = sqlite3.connect(db_path)
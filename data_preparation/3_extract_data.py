@@ -1,6 +1,24 @@
+import argparse
+import gzip
+import hashlib
+import json
 import os
+import shutil
 import sqlite3
-import pandas as pd
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from sample_info import extract_dust_number_and_washed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gui.calculations import find_crossings
 
 
 def list_sample_names(root_directory):
@@ -13,67 +31,537 @@ def list_sample_names(root_directory):
     return sample_names
 
 
-def get_all_tables(db_path):
-    """Retrieve all tables from the SQLite database and return them as a dictionary of DataFrames."""
+# Declared Arrow schemas of the EMI tables we work with. Columns not listed here are not
+# converted; the Contour blobs go into a separate {sample}_Contour.parquet file.
+TABLE_SCHEMAS = {
+    'MeasuredValues': pa.schema([
+        ('MVID', pa.int64()),
+        ('MeasID', pa.int64()),
+        ('CornerAngleLeft', pa.float64()),
+        ('CornerAngleRight', pa.float64()),
+        ('ContactAngleLeft', pa.float64()),
+        ('ContactAngleRight', pa.float64()),
+        ('AreaPercent', pa.float64()),
+        ('Area', pa.float64()),
+        ('HeightPercent', pa.float64()),
+        ('Height', pa.float64()),
+        ('WidthPercent', pa.float64()),
+        ('Width', pa.float64()),
+        ('Scope', pa.float64()),
+        ('Formfactor', pa.float64()),
+        ('GroundlinePolynom', pa.int64()),
+        ('GroundLineLengthPercent', pa.float64()),
+        ('GroundLineLength', pa.float64()),
+        ('MeasureDateTime', pa.float64()),
+        ('HeaterTemperature', pa.float64()),
+        ('Temperature', pa.float64()),
+        ('LightIntensity', pa.float64()),
+        ('ImageNr', pa.string()),  # Image filename after 2_create_overview renamed it, null for rows without image
+        ('User1', pa.float64()),
+        ('User2', pa.float64()),
+        ('User3', pa.float64()),
+        ('User4', pa.float64()),
+    ]),
+    'ImageList': pa.schema([
+        ('BLID', pa.int64()),
+        ('MeasID', pa.int64()),
+        ('MVID', pa.int64()),
+        ('Titel', pa.string()),
+        ('Show', pa.bool_()),
+        ('Index', pa.int64()),
+    ]),
+    'MeasurementSeriesMetaInfo': pa.schema([
+        ('MeasID', pa.int64()),
+        ('Directory', pa.string()),
+        ('GroupID', pa.int64()),
+        ('Name', pa.string()),
+        ('Material', pa.string()),
+        ('User', pa.string()),
+        ('UserContact', pa.string()),
+        ('UserNote', pa.string()),
+        ('DeviceID', pa.string()),
+        ('Date', pa.timestamp('ms')),
+        ('Anmerkung', pa.string()),
+        ('Samplename', pa.string()),
+        ('Filename', pa.string()),
+        ('MethodCycleTime', pa.float64()),
+        ('MethodStartMeasureTemp', pa.float64()),
+        ('MethodForm', pa.string()),
+        ('MethodName', pa.string()),
+        ('MeasureDeviceID', pa.string()),
+        ('MeasureSoftwareID', pa.string()),
+        ('HPinKproH', pa.bool_()),
+    ]),
+}
+
+# Value conversions that Arrow cannot do on its own
+COLUMN_CONVERTERS = {
+    ('MeasuredValues', 'ImageNr'): lambda x: None if x is None or x == 0 else str(x),
+    ('MeasurementSeriesMetaInfo', 'Date'): lambda x: datetime.fromisoformat(x) if isinstance(x, str) else x,
+}
+
+# Arrow types for the declared column types of tables without a schema above
+SQLITE_TYPES = {
+    'integer': pa.int64(),
+    'int': pa.int64(),
+    'real': pa.float64(),
+    'float': pa.float64(),
+    'decimal': pa.float64(),
+    'bit': pa.bool_(),
+    'image': pa.binary(),
+    'blob': pa.binary(),
+}
+
+
+def get_table_schema(cursor, table_name):
+    """Return the declared schema of a table, or derive one from the SQLite column types."""
+    cursor.execute(f"PRAGMA table_info([{table_name}]);")
+    columns = [(col[1], col[2].lower().split('(')[0]) for col in cursor.fetchall()]
+    if table_name in TABLE_SCHEMAS:
+        available = {name for name, _ in columns}
+        return pa.schema([field for field in TABLE_SCHEMAS[table_name] if field.name in available])
+    return pa.schema([(name, SQLITE_TYPES.get(declared_type, pa.string())) for name, declared_type in columns
+                      if name != 'Contour'])
+
+
+def rows_to_record_batch(table_name, schema, rows):
+    """Build a typed record batch column by column from SQLite row tuples."""
+    arrays = []
+    for field, values in zip(schema, zip(*rows)):
+        converter = COLUMN_CONVERTERS.get((table_name, field.name))
+        if converter is None and pa.types.is_boolean(field.type):
+            converter = lambda x: None if x is None else bool(x)  # bit columns are stored as 0/1
+        if converter:
+            values = [converter(x) for x in values]
+        try:
+            arrays.append(pa.array(values, type=field.type))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if table_name in TABLE_SCHEMAS:
+                raise
+            # SQLite does not enforce declared types, keep undeclared tables readable as strings
+            arrays.append(pa.array([None if x is None else str(x) for x in values], type=pa.string()))
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(
+        [pa.field(field.name, array.type) for field, array in zip(schema, arrays)]))
+
+
+def convert_table_to_parquet(cursor, table_name, parquet_path, chunk_size=10000):
+    """Stream a table into a Parquet file in chunks. Returns the written schema, or None for empty tables."""
+    schema = get_table_schema(cursor, table_name)
+    column_list = ", ".join(f"[{name}]" for name in schema.names)
+    cursor.execute(f"SELECT {column_list} FROM [{table_name}];")
+
+    writer = None
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            batch = rows_to_record_batch(table_name, schema, rows)
+            if writer is None:
+                schema = batch.schema
+                writer = pq.ParquetWriter(parquet_path, schema)
+            writer.write_batch(batch.cast(schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return schema if writer is not None else None
+
+
+def decode_contour(blob):
+    """Decode a Contour blob (gzip compressed little-endian float32 x/y pairs) into an (n, 2) array."""
+    if not blob:
+        return np.empty((0, 2), dtype=np.float32)
+    if blob[:2] == b'\x1f\x8b':
+        blob = gzip.decompress(blob)
+    return np.frombuffer(blob, dtype='<f4').reshape(-1, 2)
+
+
+def convert_contours_to_parquet(cursor, parquet_path, chunk_size=1000):
+    """Decode the Contour blobs of MeasuredValues into offset-indexed X/Y point lists in a Parquet file.
+
+    Returns the written schema, or None if there are no contours.
+    """
+    schema = pa.schema([
+        ('MVID', pa.int64()),
+        ('Temperature', pa.float64()),
+        ('X', pa.list_(pa.float32())),
+        ('Y', pa.list_(pa.float32())),
+    ])
+    cursor.execute("SELECT MVID, Temperature, Contour FROM MeasuredValues;")
+
+    writer = None
+    try:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            mvids, temperatures, blobs = zip(*rows)
+            contours = [decode_contour(blob) for blob in blobs]
+            offsets = np.zeros(len(contours) + 1, dtype=np.int32)
+            np.cumsum([len(contour) for contour in contours], out=offsets[1:])
+            points = np.concatenate(contours) if contours else np.empty((0, 2), dtype=np.float32)
+            batch = pa.RecordBatch.from_arrays([
+                pa.array(mvids, type=pa.int64()),
+                pa.array(temperatures, type=pa.float64()),
+                pa.ListArray.from_arrays(pa.array(offsets), pa.array(points[:, 0])),
+                pa.ListArray.from_arrays(pa.array(offsets), pa.array(points[:, 1])),
+            ], schema=schema)
+            if writer is None:
+                writer = pq.ParquetWriter(parquet_path, schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return schema if writer is not None else None
+
+
+def convert_tables_to_parquet(db_path, target_folder, samplename, chunk_size=10000):
+    """Convert all non-empty tables of the SQLite database into typed Parquet files.
+
+    Returns a dict of {table_name: (parquet_path, schema)}.
+    """
+    os.makedirs(target_folder, exist_ok=True)
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tables = cursor.fetchall()
-    dataframes = {}
-
-    for table_name_tuple in tables:
-        table_name = table_name_tuple[0]
-        cursor.execute(f"SELECT * FROM {table_name};")
-        rows = cursor.fetchall()
-        if rows:
-            cursor.execute(f"PRAGMA table_info({table_name});")
-            columns = [col[1] for col in cursor.fetchall()]
-            df = pd.DataFrame(rows, columns=columns)
-            # Drop the Contour column if it exists
-            if 'Contour' in df.columns:
-                df = df.drop(columns=['Contour'])
-            # Ensure correct data types for parquet conversion
-            for col in df.columns:
-                if df[col].dtype == 'object':
-                    df[col] = df[col].apply(lambda x: str(x) if isinstance(x, bytes) else x)
-                    df[col] = df[col].astype(str)
-            dataframes[table_name] = df
+    table_names = [row[0] for row in cursor.fetchall()]
+    converted = {}
+
+    for table_name in table_names:
+        parquet_path = os.path.join(target_folder, f"{samplename}_{table_name}.parquet")
+        schema = convert_table_to_parquet(cursor, table_name, parquet_path, chunk_size)
+        if schema is not None:
+            converted[table_name] = (parquet_path, schema)
+            print(f"Saved {table_name} as {parquet_path}")
+
+    if 'MeasuredValues' in table_names:
+        cursor.execute("PRAGMA table_info(MeasuredValues);")
+        if 'Contour' in [col[1] for col in cursor.fetchall()]:
+            parquet_path = os.path.join(target_folder, f"{samplename}_Contour.parquet")
+            schema = convert_contours_to_parquet(cursor, parquet_path)
+            if schema is not None:
+                converted['Contour'] = (parquet_path, schema)
+                print(f"Saved Contour as {parquet_path}")
 
     conn.close()
-    return dataframes
+    return converted
 
 
-def save_dataframes_as_parquet(dataframes, target_folder, samplename):
-    """Save the DataFrames as Parquet files into the target folder."""
-    if not os.path.exists(target_folder):
-        os.makedirs(target_folder)
+# Characteristic temperatures stored in {sample}_Summary.parquet: the first falling crossing of
+# (column, level), each searched above the previous one. AspectRatio is Height / Width of the
+# silhouette, approximating the ISO 540 shape criteria of the sphere (height = width), hemisphere
+# (height = half the width) and flow (a third of the hemisphere height) points.
+CHARACTERISTIC_POINTS = {
+    'DeformationTemperature': ('HeightPercent', 95.0),
+    'SphereTemperature': ('AspectRatio', 1.0),
+    'HemisphereTemperature': ('AspectRatio', 1 / 2),
+    'FlowTemperature': ('AspectRatio', 1 / 6),
+}
+# Guide line positions precomputed like the GUI does: HeightPercent at these temperatures and the
+# temperature at which HeightPercent first crosses these levels
+REFERENCE_TEMPERATURES = [1000.0, 1100.0, 1200.0, 1300.0, 1400.0, 1500.0]
+REFERENCE_HEIGHTS = [33.0, 50.0, 66.0, 75.0, 90.0]
+# Single frames with a misdetected silhouette (e.g. a Width jumping from 390 to 830 px for a frame
+# or two) must not set a characteristic temperature. The columns are smoothed with a rolling median
+# of SUMMARY_MEDIAN_ROWS rows and a crossing only counts if the smoothed curve does not go back to
+# the side it came from within SUMMARY_HOLD_ROWS rows.
+SUMMARY_MEDIAN_ROWS = 25
+SUMMARY_HOLD_ROWS = 25
 
-    for table_name, df in dataframes.items():
-        parquet_path = os.path.join(target_folder, f"{samplename}_{table_name}.parquet")
-        df.to_parquet(parquet_path)
-        print(f"Saved {table_name} as {parquet_path}")
 
+def rolling_median(values, window=SUMMARY_MEDIAN_ROWS):
+    """Centered rolling median over window rows, ignoring NaN; the ends are padded with the edge values."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+    padded = np.pad(values, (window // 2, window - 1 - window // 2), mode='edge')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # All-NaN windows give NaN
+        return np.nanmedian(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+
+def find_lasting_crossings(x_data, y_data, levels, hold=SUMMARY_HOLD_ROWS):
+    """find_crossings without the crossings after which y_data returns below/above the level within hold rows.
+
+    Returns (level_index, x, direction) of the remaining crossings. A crossing at the last rows of
+    the data, which cannot be confirmed, is dropped as well.
+    """
+    y = np.asarray(y_data, dtype=np.float64)
+    levels = np.atleast_1d(np.asarray(levels, dtype=np.float64))
+    level_index, row_index, crossings, direction = find_crossings(x_data, y, levels)
+    lasting = np.zeros(len(crossings), dtype=bool)
+    for i, (level, row, side) in enumerate(zip(levels[level_index], row_index, direction)):
+        following = y[row + 1:row + 1 + hold]
+        lasting[i] = side != 0 and len(following) == hold and not np.any(np.sign(following - level) == -side)
+    return level_index[lasting], crossings[lasting], direction[lasting]
+
+
+def compute_summary(sample_name, measured_values_path, reference_temperatures=REFERENCE_TEMPERATURES,
+                    reference_heights=REFERENCE_HEIGHTS):
+    """Compute the characteristic temperatures of one sample and return them as a one-row dict.
+
+    The crossings are searched on the rolling medians of the columns and must last, see
+    SUMMARY_MEDIAN_ROWS and SUMMARY_HOLD_ROWS.
+    """
+    table = pq.read_table(measured_values_path, columns=['Temperature', 'HeightPercent', 'Height', 'Width'])
+    columns = {name: table.column(name).to_numpy() for name in table.column_names}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns['AspectRatio'] = columns['Height'] / columns['Width']
+    columns = {name: rolling_median(values) for name, values in columns.items()}
+    temperature = columns['Temperature']
+
+    dust_number, washed = extract_dust_number_and_washed(sample_name)
+    summary = {'Sample': sample_name, 'Dust-Nr': dust_number, 'Washed': washed}
+
+    previous = -np.inf
+    for name, (column, level) in CHARACTERISTIC_POINTS.items():
+        _, crossings, direction = find_lasting_crossings(temperature, columns[column], level)
+        candidates = crossings[(direction < 0) & (crossings >= previous)]
+        summary[name] = float(candidates[0]) if candidates.size > 0 else np.nan
+        if candidates.size > 0:
+            previous = candidates[0]
+
+    level_index, crossings, _ = find_lasting_crossings(columns['HeightPercent'], temperature, reference_temperatures)
+    for i, reference in enumerate(reference_temperatures):
+        found = crossings[level_index == i]
+        summary[f"HeightPercent@{reference:g}"] = float(found[0]) if found.size > 0 else np.nan
+
+    level_index, crossings, _ = find_lasting_crossings(temperature, columns['HeightPercent'], reference_heights)
+    for i, reference in enumerate(reference_heights):
+        found = crossings[level_index == i]
+        summary[f"Temperature@HeightPercent{reference:g}"] = float(found[0]) if found.size > 0 else np.nan
+
+    return summary
+
+
+def write_summary(converted, target_folder, sample_name, reference_temperatures=REFERENCE_TEMPERATURES,
+                  reference_heights=REFERENCE_HEIGHTS):
+    """Write {sample}_Summary.parquet next to the converted tables and add it to converted."""
+    if 'MeasuredValues' not in converted:
+        return
+    summary = compute_summary(sample_name, converted['MeasuredValues'][0], reference_temperatures,
+                              reference_heights)
+    table = pa.Table.from_pylist([summary])
+    parquet_path = os.path.join(target_folder, f"{sample_name}_Summary.parquet")
+    pq.write_table(table, parquet_path)
+    converted['Summary'] = (parquet_path, table.schema)
+    print(f"Saved Summary as {parquet_path}")
+
+
+def find_sample_db(sample_dir):
+    """Return the path of the .dat file in a sample directory, or None."""
+    for filename in os.listdir(sample_dir):
+        if filename.endswith('.dat'):
+            return os.path.join(sample_dir, filename)  # Assuming one .dat file per sample directory
+    return None
+
+
+def get_manifest_path(target_directory):
+    """The manifest lives next to the Parquet directory, e.g. ../parquet_data_manifest.json."""
+    return os.path.normpath(target_directory) + "_manifest.json"
+
+
+def load_manifest(manifest_path):
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_manifest(manifest, manifest_path):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def is_unchanged(entry, db_path, stat):
+    """Check a manifest entry against the source file: size and mtime first, content hash if those differ."""
+    if entry is None or entry['source'] != os.path.abspath(db_path) or entry['size'] != stat.st_size:
+        return False
+    if entry['mtime_ns'] == stat.st_mtime_ns:
+        return True
+    if entry['sha256'] == hash_file(db_path):
+        entry['mtime_ns'] = stat.st_mtime_ns  # Only touched, remember the new mtime to skip hashing next time
+        return True
+    return False
+
+
+def remove_outputs(target_directory, filenames):
+    for filename in filenames:
+        path = os.path.join(target_directory, filename)
+        if os.path.exists(path):
+            os.remove(path)
+            print(f"Removed {path}")
+        # Drop partition directories that became empty
+        parent = os.path.dirname(path)
+        while os.path.normpath(parent) != os.path.normpath(target_directory) and os.path.isdir(parent) \
+                and not os.listdir(parent):
+            os.rmdir(parent)
+            parent = os.path.dirname(parent)
+
+
+# Tables that are also written into the Hive-style partitioned dataset
+DATASET_TABLES = ['MeasuredValues', 'ImageList', 'MeasurementSeriesMetaInfo', 'Contour', 'Summary']
+HIVE_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+
+def write_dataset_partitions(converted, dataset_directory, sample_name):
+    """Add the converted tables of a sample to the partitioned dataset.
+
+    Files go to {dataset_directory}/{table}/dust_nr=.../washed=.../sample=.../part-0.parquet, with the
+    partition values taken from extract_dust_number_and_washed. Returns the paths relative to
+    dataset_directory.
+    """
+    dust_number, washed = extract_dust_number_and_washed(sample_name)
+    partition = os.path.join(f"dust_nr={dust_number or HIVE_NULL_PARTITION}", f"washed={washed}",
+                             f"sample={sample_name}")
+    written = []
+    for table_name in DATASET_TABLES:
+        if table_name not in converted:
+            continue
+        relative_path = os.path.join(table_name, partition, 'part-0.parquet')
+        dataset_path = os.path.join(dataset_directory, relative_path)
+        os.makedirs(os.path.dirname(dataset_path), exist_ok=True)
+        shutil.copyfile(converted[table_name][0], dataset_path)
+        written.append(relative_path)
+    return written
+
+
+def ingest_sample(sample_name, db_path, target_directory, dataset_directory,
+                  reference_temperatures=REFERENCE_TEMPERATURES, reference_heights=REFERENCE_HEIGHTS):
+    """Convert the tables of one sample to Parquet files and return its manifest entry and the elapsed time."""
+    start_time = time.time()
+    stat = os.stat(db_path)
+    converted = convert_tables_to_parquet(db_path, target_directory, sample_name)
+    write_summary(converted, target_directory, sample_name, reference_temperatures, reference_heights)
+    dataset_outputs = write_dataset_partitions(converted, dataset_directory, sample_name)
+    entry = {
+        'source': os.path.abspath(db_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': hash_file(db_path),
+        'schema': {table_name: {field.name: str(field.type) for field in schema}
+                   for table_name, (_, schema) in converted.items()},
+        'outputs': [os.path.basename(path) for path, _ in converted.values()],
+        'dataset_outputs': dataset_outputs,
+    }
+    return entry, time.time() - start_time
+
+
+def process_samples(root_directory, target_directory, dataset_directory, workers=1, force=False,
+                    reference_temperatures=REFERENCE_TEMPERATURES, reference_heights=REFERENCE_HEIGHTS):
+    """Process new or modified samples to extract tables and save them as Parquet files.
+
+    Each sample also gets a {sample}_Summary.parquet with its characteristic temperatures, see
+    compute_summary.
+
+    Besides the {sample}_{table}.parquet files in target_directory, the main tables are added to a
+    Hive-style dataset in dataset_directory, partitioned by dust number, washed flag and sample.
+
+    A manifest next to the target directory records the source file, size, mtime, content hash
+    and schema of every converted sample, so unchanged samples are skipped on re-runs and the
+    Parquet files of samples whose source has gone are removed. force converts all samples but
+    still uses the manifest to clean up after removed samples. With workers > 1 the samples are
+    converted in a process pool. Returns a dict of {sample_name: error message} for the samples
+    that failed.
+    """
+    manifest_path = get_manifest_path(target_directory)
+    # Loaded with force as well, so the outputs of samples whose source has gone are still removed
+    manifest = load_manifest(manifest_path)
+
+    jobs = []
+    present = set()
+    for sample_name in list_sample_names(root_directory):
+        db_path = find_sample_db(os.path.join(root_directory, sample_name))
+        if not db_path:
+            continue
+        present.add(sample_name)
+        if not force and is_unchanged(manifest.get(sample_name), db_path, os.stat(db_path)):
+            continue
+        jobs.append((sample_name, db_path))
+
+    for sample_name in set(manifest) - present:
+        print(f"Source of {sample_name} has gone")
+        entry = manifest.pop(sample_name)
+        remove_outputs(target_directory, entry['outputs'])
+        remove_outputs(dataset_directory, entry.get('dataset_outputs', []))
+
+    print(f"{len(jobs)} new or modified samples, {len(present) - len(jobs)} unchanged")
+
+    os.makedirs(target_directory, exist_ok=True)
+    failures = {}
+    start_time = time.time()
+
+    def report(done, sample_name, result=None, error=None):
+        if error is None:
+            entry, elapsed = result
+            previous = manifest.get(sample_name)
+            if previous:
+                remove_outputs(target_directory, set(previous['outputs']) - set(entry['outputs']))
+                remove_outputs(dataset_directory,
+                               set(previous.get('dataset_outputs', [])) - set(entry['dataset_outputs']))
+            manifest[sample_name] = entry
+            print(f"[{done}/{len(jobs)}] {sample_name} took {elapsed:.2f} seconds")
+        else:
+            failures[sample_name] = error
+            print(f"[{done}/{len(jobs)}] {sample_name} failed: {error}")
+
+    if workers <= 1:
+        for done, (sample_name, db_path) in enumerate(jobs, start=1):
+            try:
+                report(done, sample_name,
+                       result=ingest_sample(sample_name, db_path, target_directory, dataset_directory,
+                                            reference_temperatures, reference_heights))
+            except Exception as e:
+                report(done, sample_name, error=f"{type(e).__name__}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(ingest_sample, sample_name, db_path, target_directory,
+                                       dataset_directory, reference_temperatures, reference_heights): sample_name
+                       for sample_name, db_path in jobs}
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    report(done, futures[future], result=future.result())
+                except Exception as e:
+                    report(done, futures[future], error=f"{type(e).__name__}: {e}")
 
-def process_samples(root_directory, target_directory):
-    """Process all samples to extract tables and save them as Parquet files."""
-    sample_names = list_sample_names(root_directory)
+    save_manifest(manifest, manifest_path)
 
-    for sample_name in sample_names:
-        sample_dir = os.path.join(root_directory, sample_name)
-        for filename in os.listdir(sample_dir):
-            if filename.endswith('.dat'):
-                db_path = os.path.join(sample_dir, filename)
-                dataframes = get_all_tables(db_path)
-                save_dataframes_as_parquet(dataframes, target_directory, sample_name)
-                break  # Assuming one .dat file per sample directory
+    print(f"Converted {len(jobs) - len(failures)} of {len(jobs)} samples in {time.time() - start_time:.2f} seconds")
+    if failures:
+        print("Failed samples:")
+        for sample_name, error in sorted(failures.items()):
+            print(f"  {sample_name}: {error}")
+    return failures
 
 
 def main():
-    root_directory = '../data'
-    target_directory = '../parquet_data'
-    process_samples(root_directory, target_directory)
+    parser = argparse.ArgumentParser(description="Extract the tables of all sample .dat files into Parquet files.")
+    parser.add_argument('--root', default='../data', help="Directory with one folder per sample")
+    parser.add_argument('--target', default='../parquet_data', help="Output directory for the Parquet files")
+    parser.add_argument('--dataset', default='../parquet_dataset',
+                        help="Output directory for the partitioned dataset")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="Number of worker processes (1 converts the samples serially)")
+    parser.add_argument('--force', action='store_true', help="Convert all samples, also the unchanged ones")
+    parser.add_argument('--reference-temperatures', type=float, nargs='+', default=REFERENCE_TEMPERATURES,
+                        help="Temperatures to store HeightPercent at in the summary (use --force after changing)")
+    parser.add_argument('--reference-heights', type=float, nargs='+', default=REFERENCE_HEIGHTS,
+                        help="HeightPercent levels to store the temperature of in the summary")
+    args = parser.parse_args()
+    process_samples(args.root, args.target, args.dataset, args.workers, args.force,
+                    args.reference_temperatures, args.reference_heights)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from sample_info import extract_dust_number_and_washed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gui.calculations import find_crossings
+
+# Same guide line defaults as the plotting GUI
+DEFAULT_HLINES = [33.0]
+DEFAULT_VLINES = [1200.0]
+
+
+def list_parquet_samples(parquet_directory):
+    """List the samples that have a MeasuredValues Parquet file."""
+    suffix = "_MeasuredValues.parquet"
+    return sorted(filename[:-len(suffix)] for filename in os.listdir(parquet_directory) if filename.endswith(suffix))
+
+
+def evaluate_sample(sample_name, parquet_directory, x_column, y_column, hlines, vlines, direction=0):
+    """Evaluate all guide lines for one sample and return a report row.
+
+    Like the GUI, a horizontal line gives the x of the first crossing of y_column and a vertical
+    line the y of the first crossing of x_column. With direction -1 or +1 only falling or rising
+    crossings of the horizontal lines are used.
+    """
+    parquet_path = os.path.join(parquet_directory, f"{sample_name}_MeasuredValues.parquet")
+    table = pq.read_table(parquet_path, columns=list(dict.fromkeys([x_column, y_column])))
+    x_data = table.column(x_column).to_numpy()
+    y_data = table.column(y_column).to_numpy()
+
+    dust_number, washed = extract_dust_number_and_washed(sample_name)
+    row = {'Name': sample_name, 'Dust-Nr': dust_number, 'Washed': washed}
+
+    level_index, _, crossings, directions = find_crossings(x_data, y_data, hlines)
+    if direction:
+        level_index, crossings = level_index[directions == direction], crossings[directions == direction]
+    for i, hline_y in enumerate(hlines):
+        found = crossings[level_index == i]
+        row[f"{x_column}@{y_column}{hline_y:g}"] = found[0] if found.size > 0 else np.nan
+
+    level_index, _, crossings, _ = find_crossings(y_data, x_data, vlines)
+    for i, vline_x in enumerate(vlines):
+        found = crossings[level_index == i]
+        row[f"{y_column}@{vline_x:g}"] = found[0] if found.size > 0 else np.nan
+
+    return row
+
+
+def create_report(parquet_directory, x_column='Temperature', y_column='HeightPercent', hlines=DEFAULT_HLINES,
+                  vlines=DEFAULT_VLINES, direction=0, workers=1):
+    """Evaluate the guide lines for all samples and return a DataFrame shaped like samples_overview.xlsx."""
+    sample_names = list_parquet_samples(parquet_directory)
+    args = [(sample_name, parquet_directory, x_column, y_column, hlines, vlines, direction)
+            for sample_name in sample_names]
+
+    if workers <= 1:
+        rows = [evaluate_sample(*sample_args) for sample_args in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            rows = list(executor.map(evaluate_sample, *zip(*args), chunksize=8)) if args else []
+
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return df
+    df['Dust-Nr'] = pd.to_numeric(df['Dust-Nr'], errors='coerce')
+    return df.sort_values(by=['Dust-Nr', 'Washed']).reset_index(drop=True)
+
+
+def save_report(df, output_path):
+    """Save the report as CSV, Excel or Parquet depending on the file extension."""
+    extension = os.path.splitext(output_path)[1].lower()
+    if extension == '.csv':
+        df.to_csv(output_path, index=False)
+    elif extension in ('.xlsx', '.xls'):
+        df.to_excel(output_path, index=False)
+    elif extension == '.parquet':
+        df.to_parquet(output_path, index=False)
+    else:
+        raise ValueError(f"Unsupported report format '{extension}', use .csv, .xlsx or .parquet")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate horizontal/vertical guide lines for all samples without starting the GUI.")
+    parser.add_argument('--parquet', default='../parquet_data', help="Directory with the Parquet files")
+    parser.add_argument('--output', default='../outputs/characteristic_temperatures.xlsx',
+                        help="Report file (.csv, .xlsx or .parquet)")
+    parser.add_argument('--x-column', default='Temperature')
+    parser.add_argument('--y-column', default='HeightPercent')
+    parser.add_argument('--hlines', type=float, nargs='+', default=DEFAULT_HLINES,
+                        help="Horizontal line positions (y values)")
+    parser.add_argument('--vlines', type=float, nargs='+', default=DEFAULT_VLINES,
+                        help="Vertical line positions (x values)")
+    parser.add_argument('--direction', choices=['any', 'falling', 'rising'], default='any',
+                        help="Which crossings of the horizontal lines to report")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Number of worker processes")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    direction = {'any': 0, 'falling': -1, 'rising': 1}[args.direction]
+    df = create_report(args.parquet, args.x_column, args.y_column, args.hlines, args.vlines, direction,
+                       args.workers)
+
+    output_directory = os.path.dirname(args.output)
+    if output_directory:
+        os.makedirs(output_directory, exist_ok=True)
+    save_report(df, args.output)
+    print(f"Report for {len(df)} samples saved as '{args.output}' in {time.time() - start_time:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
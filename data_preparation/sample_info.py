@@ -0,0 +1,12 @@
+import re
+
+
+def extract_dust_number_and_washed(name):
+    # Extract dust number using regex
+    dust_number_match = re.search(r'EAFD_(\d+[_\d]*)', name)
+    dust_number = dust_number_match.group(1).split('_')[0] if dust_number_match else ''
+
+    # Determine washed status
+    washed = 0 if 'W' in name else 1
+
+    return dust_number, washed
@@ -0,0 +1,171 @@
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+PLOT_FIGSIZE = (5, 4)  # Inches, at PLOT_DPI
+PLOT_DPI = 100
+CROP_FRACTION = 0.2  # Cut off the left and right sides of the sample image
+MIN_CELL_HEIGHT = 200  # Smallest height of a sample image when several samples are shown
+
+# Plot renderer of the samples being animated, created once per worker process by init_worker
+_worker_state = {}
+
+
+class FrameRenderer:
+    """Draws the growing HeightPercent curves of a temperature sweep on a single reused figure.
+
+    curves maps sample names to (temperatures, heights); all curves share one axes. The axes,
+    labels and ticks are drawn once. Each frame only draws the curve segments added since the
+    previous frame on top of the cached curves so far, then the legend and a cursor marker at
+    the current point of every curve, and returns the Agg buffer as an array. The per-frame cost
+    therefore does not grow with the sweep as long as frames come in rising temperature order;
+    a lower temperature starts the curves over.
+    """
+
+    def __init__(self, curves, min_temp, max_temp):
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=PLOT_FIGSIZE, dpi=PLOT_DPI)
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.ax = self.figure.add_subplot(111)
+
+        self.curves = []  # (temperatures, heights, highest temperature reached so far, segment, cursor)
+        for sample_name, (temperatures, heights) in curves.items():
+            temperatures = np.asarray(temperatures, dtype=np.float64)
+            # A frame shows the data up to the first point beyond its temperature
+            reached = np.maximum.accumulate(np.nan_to_num(temperatures, nan=-np.inf))
+            segment, = self.ax.plot([], [], label=sample_name, animated=True)
+            cursor, = self.ax.plot([], [], 'o', color=segment.get_color(), animated=True)
+            self.curves.append((temperatures, np.asarray(heights, dtype=np.float64), reached, segment, cursor))
+
+        self.ax.set_xlim(min_temp, max_temp)
+        self.ax.set_ylim(0, 120)
+        self.ax.set_xlabel('Temperature')
+        self.ax.set_ylabel('Height Percent')
+        self.legend = self.ax.legend(handles=[curve[3] for curve in self.curves], loc='upper right')
+        self.legend.set_animated(True)
+        self.reset()
+
+    def reset(self):
+        """Draw the static parts of the figure and start the curves over."""
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.drawn = [0] * len(self.curves)  # Number of data points of each curve already in the background
+
+    def render(self, temp):
+        """Return the plot for the given temperature as an (height, width, 3) uint8 array."""
+        counts = [int(np.searchsorted(reached, temp, side='right')) for _, _, reached, _, _ in self.curves]
+        if any(count < drawn for count, drawn in zip(counts, self.drawn)):
+            self.reset()
+
+        self.canvas.restore_region(self.background)
+        if counts != self.drawn:
+            for (temperatures, heights, _, segment, _), count, drawn in zip(self.curves, counts, self.drawn):
+                if count > drawn:
+                    start = max(drawn - 1, 0)  # Start at the last drawn point so the segments join
+                    segment.set_data(temperatures[start:count], heights[start:count])
+                    self.ax.draw_artist(segment)
+            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+            self.drawn = counts
+
+        self.ax.draw_artist(self.legend)
+        for (temperatures, heights, _, _, cursor), count in zip(self.curves, counts):
+            if count > 0:
+                cursor.set_data([temperatures[count - 1]], [heights[count - 1]])
+                self.ax.draw_artist(cursor)
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+
+def create_decoder(curves):
+    """Thread pool decoding the images of one frame in parallel, None for a single sample."""
+    return ThreadPoolExecutor(max_workers=min(len(curves), 8)) if len(curves) > 1 else None
+
+
+def init_worker(curves, min_temp, max_temp):
+    """Build the plot renderer in the worker process, so the curves are sent once per worker instead of once per frame."""
+    _worker_state.update(renderer=FrameRenderer(curves, min_temp, max_temp), decoder=create_decoder(curves))
+
+
+def compose_frame(plot_img, images):
+    """Place the sample images, cropped at the sides, in a grid to the right of the plot.
+
+    A single image is scaled to the plot height; several images are arranged in a near-square
+    grid whose cells are at least MIN_CELL_HEIGHT high.
+    """
+    from PIL import Image, ImageOps
+
+    plot_height = plot_img.height
+    columns = math.ceil(math.sqrt(len(images)))
+    rows = math.ceil(len(images) / columns)
+    cell_height = plot_height if rows == 1 else max(plot_height // rows, MIN_CELL_HEIGHT)
+
+    cells = []
+    for img in images:
+        img = ImageOps.fit(img, (int(img.width * cell_height / img.height), cell_height),
+                           method=Image.Resampling.LANCZOS)
+        crop_width = int(img.width * CROP_FRACTION)
+        cells.append(img.crop((crop_width, 0, img.width - crop_width, img.height)))
+    cell_width = max(cell.width for cell in cells)
+
+    height = max(plot_height, rows * cell_height)
+    combined_img = Image.new('RGB', (plot_img.width + columns * cell_width, height), 'white')
+    combined_img.paste(plot_img, (0, (height - plot_height) // 2))
+    for i, cell in enumerate(cells):
+        combined_img.paste(cell, (plot_img.width + (i % columns) * cell_width, (i // columns) * cell_height))
+    return combined_img
+
+
+def render_frame(temp, images, renderer=None, decoder=None):
+    """Render one animation frame as an RGB array.
+
+    images is a list of (folder_path, image_filename, closest_temp, sample_name) tuples, one per
+    sample; with several samples they are decoded in parallel threads. Without a renderer the
+    one built by init_worker is used, which is only valid in a pool worker process.
+    """
+    from PIL import Image
+    from picture_for_temperature import render_selected_image
+
+    if renderer is None:
+        renderer, decoder = _worker_state['renderer'], _worker_state['decoder']
+    if decoder is None:
+        decoded = [render_selected_image(*image) for image in images]
+    else:
+        decoded = list(decoder.map(lambda image: render_selected_image(*image), images))
+    plot_img = Image.fromarray(renderer.render(temp))
+    return np.asarray(compose_frame(plot_img, decoded))
+
+
+def render_frames(curves, frames, min_temp, max_temp, workers=None):
+    """Render the frames of a temperature sweep in a process pool and yield them in order as RGB arrays.
+
+    curves maps sample names to (temperatures, heights) and frames is a list of (temp, images)
+    tuples as taken by render_frame. Only a few frames per worker are in flight at a time, so
+    the encoder consuming the generator bounds how many finished frames are held in memory.
+    """
+    workers = workers or os.cpu_count()
+    initargs = ({sample_name: (np.asarray(temperatures), np.asarray(heights))
+                 for sample_name, (temperatures, heights) in curves.items()}, min_temp, max_temp)
+
+    if workers <= 1:
+        # Rendered in this process with its own renderer, so several sweeps can run in parallel threads
+        renderer, decoder = FrameRenderer(*initargs), create_decoder(initargs[0])
+        try:
+            for frame in frames:
+                yield render_frame(*frame, renderer, decoder)
+        finally:
+            if decoder is not None:
+                decoder.shutdown()
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as executor:
+        in_flight = deque()
+        for frame in frames:
+            in_flight.append(executor.submit(render_frame, *frame))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
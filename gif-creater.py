@@ -1,74 +1,110 @@
 import os
+import queue
+import tempfile
+import threading
+import time
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
-from PIL import Image, ImageTk, ImageOps
-import imageio.v3 as iio
-import pandas as pd
-from matplotlib import pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
-from gui.data_handler import get_sample_names, load_parquet_file
-from picture_for_temperature import process_folder
-
-
-def create_gif(sample_name, min_temp, max_temp, temp_step):
-    images = []
-    temp = min_temp
-    df = load_parquet_file(sample_name, "")
+from gui.data_handler import get_sample_names
+from image_cache import image_cache
+
+GIF_READ_AHEAD = 4  # Frames decoded ahead of the playhead while playing
+JOB_THREADS = 2  # GIF jobs rendered at the same time, further jobs wait in the queue
+JOB_WORKERS = max(1, (os.cpu_count() or 1) // JOB_THREADS)  # Frame rendering processes per job
+
+
+class AnimationCancelled(Exception):
+    """Raised by create_animation when its cancel_event is set."""
+
+
+def create_gif(sample_name, min_temp, max_temp, temp_step, workers=None, fps=2.0, output_format='gif'):
+    return create_animation([sample_name], min_temp, max_temp, temp_step, workers, fps, output_format)
+
+
+def create_animation(sample_names, min_temp, max_temp, temp_step, workers=None, fps=2.0, output_format='gif',
+                     progress=None, cancel_event=None):
+    """Animate one synchronized temperature sweep of one or more samples.
 
+    Each frame shows the HeightPercent curves of all samples overlaid next to a grid with the
+    image of every sample at that temperature, e.g. a washed and an unwashed dust side by side.
+
+    progress(stage, frames_done, frame_count, timings) is called when a stage starts and after
+    every written frame; timings maps the stages 'lookup', 'curves' and 'frames' to the seconds
+    spent in them so far. Setting cancel_event stops the job between frames, removes the
+    partial file and raises AnimationCancelled. The file is named after the samples, the
+    temperature range and the step.
+    """
+    # The imaging and plotting stack is only imported when a GIF is created (see startup_benchmark.py)
+    from animation_writer import write_animation
+    from gui.data_handler import load_columns
+    from picture_for_temperature import find_closest_images
+    from frame_rendering import render_frames
+
+    timings = {}
+
+    def start_stage(stage, frames_done=0):
+        if cancel_event is not None and cancel_event.is_set():
+            raise AnimationCancelled()
+        timings[stage] = 0.0
+        if progress is not None:
+            progress(stage, frames_done, len(temps), dict(timings))
+        return time.perf_counter()
+
+    temps = []
+    temp = min_temp
     while temp <= max_temp:
-        process_folder('data', temp, sample_name)
-        img_path = f'selected_images/{temp:.0f}/{sample_name}.jpeg'
-
-        # Load image
-        img = Image.open(img_path)
-
-        # Create Matplotlib plot
-        fig = Figure(figsize=(5, 4), dpi=100)
-        ax = fig.add_subplot(111)
-        filtered_df = df[df['Temperature'] <= temp]
-        ax.plot(filtered_df['Temperature'], filtered_df['HeightPercent'], label=sample_name)
-        ax.set_xlim(min_temp, max_temp)
-        ax.set_ylim(0, 120)
-        ax.set_xlabel('Temperature')
-        ax.set_ylabel('Height Percent')
-        ax.legend()
-
-        # Save the plot to a PNG image
-        plot_path = f'selected_images/{temp:.0f}/{sample_name}_plot.png'
-        fig.savefig(plot_path)
-        plt.close(fig)
-
-        # Open the plot image and measure its height
-        plot_img = Image.open(plot_path)
-        plot_height = plot_img.height
-
-        # Shrink the GIF image to the same height as the plot while maintaining aspect ratio
-        img = ImageOps.fit(img, (int(img.width * plot_height / img.height), plot_height), method=Image.Resampling.LANCZOS)
-
-        # Cut 20% off the left and right sides of the GIF image
-        crop_width = int(img.width * 0.2)
-        img = img.crop((crop_width, 0, img.width - crop_width, img.height))
-
-        # Combine the plot and the modified GIF image side by side
-        combined_width = plot_img.width + img.width
-        combined_height = plot_height
-        combined_img = Image.new('RGB', (combined_width, combined_height))
-
-        # Place the plot on the left and the modified GIF image on the right
-        combined_img.paste(plot_img, (0, 0))
-        combined_img.paste(img, (plot_img.width, 0))
-
-        # Save the combined image
-        combined_img_path = f'selected_images/{temp:.0f}/{sample_name}_combined.jpeg'
-        combined_img.save(combined_img_path)
-
-        # Append the combined image to the GIF
-        images.append(iio.imread(combined_img_path))
+        temps.append(temp)
         temp += temp_step
 
-    gif_path = f'{sample_name}_temperature_change.gif'
-    iio.imwrite(gif_path, images, format='GIF', duration=0.5)
+    # Look up the images of all frames in one pass per sample instead of one table read per frame
+    stage_start = start_stage('lookup')
+    lookup = find_closest_images('data', temps, sample_names)
+    missing = [sample_name for sample_name in sample_names
+               if sample_name not in lookup or not all(lookup[sample_name][2])]
+    if missing:
+        raise ValueError(f"No measurement images found for sample(s) {', '.join(missing)}")
+    timings['lookup'] = time.perf_counter() - stage_start
+
+    stage_start = start_stage('curves')
+    curves = {}
+    for sample_name in sample_names:
+        df = load_columns(sample_name, ['Temperature', 'HeightPercent'], "")
+        curves[sample_name] = (df['Temperature'].values, df['HeightPercent'].values)
+
+    frames = []
+    for i, temp in enumerate(temps):
+        images = []
+        for sample_name in sample_names:
+            folder_path, closest_temps, image_filenames = lookup[sample_name]
+            images.append((folder_path, str(image_filenames[i]), closest_temps[i], sample_name))
+        frames.append((temp, images))
+    timings['curves'] = time.perf_counter() - stage_start
+
+    def tracked(rendered_frames):
+        for frames_done, frame in enumerate(rendered_frames, 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise AnimationCancelled()
+            yield frame
+            timings['frames'] = time.perf_counter() - stage_start
+            if progress is not None:
+                progress('frames', frames_done, len(frames), dict(timings))
+
+    # Frames are composed in a process pool and encoded in order as they finish, without
+    # collecting the whole sweep in memory. Each job writes to its own temporary file, which
+    # only replaces the final file once it is complete, so concurrent jobs never share a file.
+    gif_path = (f'{"_vs_".join(sample_names)}_{min_temp:g}-{max_temp:g}_step{temp_step:g}'
+                f'_temperature_change.{output_format}')
+    fd, tmp_path = tempfile.mkstemp(suffix=f'.{output_format}', prefix=f'{gif_path}.', dir='.')
+    os.close(fd)
+    stage_start = start_stage('frames')
+    try:
+        write_animation(tmp_path, tracked(render_frames(curves, frames, min_temp, max_temp, workers)), fps)
+        os.replace(tmp_path, gif_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"Created {gif_path}: " + ", ".join(f"{stage} {seconds:.2f} s" for stage, seconds in timings.items()))
     return gif_path
 
 
@@ -77,10 +113,30 @@ class GIFCreatorApp:
         self.root = root
         self.root.title("GIF Creator")
 
-        self.frames = []
+        self.gif_image = None  # (gif key, open PIL image), only used by the decoder thread
+        self.gif_key = None
+        self.frame_image = None
         self.current_frame = 0
+        self.displayed_frame = None
         self.frame_count = 0
         self.playing = False
+        self.play_job = None
+
+        # All GIF frames are decoded in one background thread; the Tk thread only shows cached
+        # frames and is told through decoded_frames when a requested frame is ready
+        self.decoder = ThreadPoolExecutor(max_workers=1)
+        self.decode_queued = {}  # (gif key, frame index) -> future of its decode job
+        self.decoded_frames = queue.Queue()
+        self.polling_frames = False
+        self.scrub_request = None
+
+        # GIF jobs run in background threads, JOB_THREADS at a time; their progress is passed
+        # to the Tk thread through job_updates
+        self.job_executor = ThreadPoolExecutor(max_workers=JOB_THREADS)
+        self.job_updates = queue.Queue()
+        self.jobs = {}  # job id -> widgets and state of the job
+        self.polling_jobs = False
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.notebook = ttk.Notebook(root)
         self.notebook.pack(expand=True, fill='both')
@@ -102,23 +158,43 @@ class GIFCreatorApp:
         self.sample_menu = ttk.Combobox(self.create_gif_tab, textvariable=self.sample_var, values=samples)
         self.sample_menu.grid(row=0, column=1)
 
-        tk.Label(self.create_gif_tab, text="Min Temp:").grid(row=1, column=0)
+        # Further samples for a side-by-side comparison animation of one synchronized sweep
+        tk.Label(self.create_gif_tab, text="Compare with:").grid(row=1, column=0, sticky="n")
+        self.compare_list = tk.Listbox(self.create_gif_tab, selectmode=tk.MULTIPLE, exportselection=False, height=6)
+        self.compare_list.insert("end", *sorted(samples))
+        self.compare_list.grid(row=1, column=1)
+
+        tk.Label(self.create_gif_tab, text="Min Temp:").grid(row=2, column=0)
         self.min_temp_entry = tk.Entry(self.create_gif_tab)
-        self.min_temp_entry.grid(row=1, column=1)
+        self.min_temp_entry.grid(row=2, column=1)
 
-        tk.Label(self.create_gif_tab, text="Max Temp:").grid(row=2, column=0)
+        tk.Label(self.create_gif_tab, text="Max Temp:").grid(row=3, column=0)
         self.max_temp_entry = tk.Entry(self.create_gif_tab)
-        self.max_temp_entry.grid(row=2, column=1)
+        self.max_temp_entry.grid(row=3, column=1)
 
-        tk.Label(self.create_gif_tab, text="Temp Step:").grid(row=3, column=0)
+        tk.Label(self.create_gif_tab, text="Temp Step:").grid(row=4, column=0)
         self.temp_step_entry = tk.Entry(self.create_gif_tab)
-        self.temp_step_entry.grid(row=3, column=1)
+        self.temp_step_entry.grid(row=4, column=1)
+
+        tk.Label(self.create_gif_tab, text="FPS:").grid(row=5, column=0)
+        self.fps_entry = tk.Entry(self.create_gif_tab)
+        self.fps_entry.insert(0, "2")
+        self.fps_entry.grid(row=5, column=1)
+
+        tk.Label(self.create_gif_tab, text="Format:").grid(row=6, column=0)
+        self.format_var = tk.StringVar(value="gif")
+        ttk.Combobox(self.create_gif_tab, textvariable=self.format_var, values=["gif", "webp", "mp4"],
+                     state="readonly").grid(row=6, column=1)
 
         self.create_button = tk.Button(self.create_gif_tab, text="Create GIF", command=self.on_create_gif)
-        self.create_button.grid(row=4, column=0, columnspan=2)
+        self.create_button.grid(row=7, column=0, columnspan=2)
 
         self.result_label = tk.Label(self.create_gif_tab, text="")
-        self.result_label.grid(row=5, column=0, columnspan=2)
+        self.result_label.grid(row=8, column=0, columnspan=2)
+
+        # One row per queued GIF job with its progress, ETA and cancel button
+        self.jobs_frame = tk.Frame(self.create_gif_tab)
+        self.jobs_frame.grid(row=9, column=0, columnspan=2, sticky="w")
 
 
     def setup_view_gif_tab(self):
@@ -146,7 +222,7 @@ class GIFCreatorApp:
     def load_gif_files(self):
         if not os.path.exists('gifs'):
             os.makedirs('gifs')
-        gif_files = [f for f in os.listdir('gifs') if f.endswith('.gif')]
+        gif_files = [f for f in os.listdir('gifs') if f.endswith(('.gif', '.webp'))]
         self.gif_menu['values'] = gif_files
 
 
@@ -157,67 +233,281 @@ class GIFCreatorApp:
 
 
     def display_gif(self, gif_path):
-        gif_image = Image.open(gif_path)
-        self.frames = []
-
-        try:
-            while True:
-                frame = ImageTk.PhotoImage(gif_image.copy().convert("RGBA"))
-                self.frames.append(frame)
-                gif_image.seek(gif_image.tell() + 1)
-        except EOFError:
-            pass
-
+        self.pause_gif()
+
+        # Frames are decoded on demand in the decoder thread and kept in the shared image cache
+        # instead of converting every frame to a PhotoImage up front. The decoder thread also
+        # opens the file and owns the handle, so the Tk thread never waits for it; a new gif_key
+        # makes the decoder drop the work queued for the previous GIF.
+        self.gif_key = (gif_path, os.stat(gif_path).st_mtime_ns)
+        self.frame_count = 0  # Known once open_gif has counted the frames
         self.current_frame = 0
-        self.frame_count = len(self.frames)
-
-        if self.frame_count > 0:
-            self.frame_slider.config(to=self.frame_count - 1)
-            self.playing = False
-            self.update_gif_frame()
+        self.displayed_frame = None
+        self.submit_decode((self.gif_key, None), self.open_gif, self.gif_key)
+
+
+    def open_gif(self, gif_key):
+        """Open a GIF in the decoder thread, closing the previous one, and return its number of frames."""
+        from PIL import Image
+        if self.gif_image is not None:
+            self.gif_image[1].close()
+            self.gif_image = None
+        if gif_key != self.gif_key:  # Another GIF was opened in the meantime
+            return 0
+        image = Image.open(gif_key[0])
+        self.gif_image = (gif_key, image)
+        return getattr(image, 'n_frames', 1)
+
+
+    def decode_frames(self, gif_key, index):
+        """Decode frame index into the cache, in the decoder thread.
+
+        Pillow can only decode a GIF frame after every frame before it, and a backward seek
+        starts over at frame 0, so all frames passed on the way are cached as well. Scrubbing
+        back to them, or playing on from there, then needs no decoding. The walk stops as soon
+        as another GIF is opened.
+        """
+        if self.gif_image is None or self.gif_image[0] != gif_key:
+            return
+        image = self.gif_image[1]
+        if image_cache.peek((gif_key, index)) is not None:
+            return
+        position = image.tell()
+        for i in range(position if position <= index else 0, index + 1):
+            if gif_key != self.gif_key:
+                return
+            image.seek(i)
+            if image_cache.peek((gif_key, i)) is None:
+                # convert keeps the frame's info, including its duration
+                image_cache.put((gif_key, i), image.convert("RGBA"))
+
+
+    def submit_decode(self, key, fn, *args):
+        """Run fn in the decoder thread; poll_decoded_frames handles the result on the Tk thread."""
+        future = self.decoder.submit(fn, *args)
+        self.decode_queued[key] = future
+        future.add_done_callback(lambda f: self.decoded_frames.put((key, f)))
+        if not self.polling_frames:
+            self.polling_frames = True
+            self.root.after(10, self.poll_decoded_frames)
+        return future
+
+
+    def request_frame(self, index):
+        """Queue frame index for decoding unless it is cached, and return its future (None when cached)."""
+        key = (self.gif_key, index)
+        future = self.decode_queued.get(key)
+        if (future is None or future.cancelled()) and image_cache.peek(key) is None:
+            future = self.submit_decode(key, self.decode_frames, *key)
+        return future
+
+
+    def poll_decoded_frames(self):
+        while True:
+            try:
+                key, future = self.decoded_frames.get_nowait()
+            except queue.Empty:
+                break
+            if self.decode_queued.get(key) is future:
+                del self.decode_queued[key]
+            if future.cancelled():
+                continue
+            gif_key, index = key
+            if future.exception() is not None:
+                print(f"Error decoding frame {index} of {gif_key[0]}: {future.exception()}")
+            elif gif_key != self.gif_key:
+                continue
+            elif index is None:
+                # open_gif finished, the frame count is known now
+                self.frame_count = future.result()
+                if self.frame_count > 0:
+                    self.frame_slider.config(to=self.frame_count - 1)
+                    self.show_frame(0)
+            elif not self.playing and index == self.current_frame and self.displayed_frame != index:
+                # Shown only if the slider is still at the frame, a later scrub position wins
+                self.show_frame(self.current_frame, read_ahead=False)
+
+        self.polling_frames = bool(self.decode_queued)
+        if self.polling_frames:
+            self.root.after(10, self.poll_decoded_frames)
+
+
+    def read_ahead(self, index):
+        """Queue the next GIF_READ_AHEAD frames after index for decoding."""
+        for offset in range(1, min(GIF_READ_AHEAD, self.frame_count - 1) + 1):
+            self.request_frame((index + offset) % self.frame_count)
+
+
+    def show_frame(self, index, read_ahead=True):
+        """Show one frame and return its duration in milliseconds.
+
+        A frame that is not cached yet is queued for decoding instead and None is returned, the
+        Tk thread never decodes.
+        """
+        from PIL import ImageTk
+        frame = image_cache.peek((self.gif_key, index))
+        if frame is None:
+            future = self.request_frame(index)
+            if not self.playing:
+                # Only the latest scrub position matters; drop the previous one if it has not started
+                if self.scrub_request is not None and self.scrub_request is not future:
+                    self.scrub_request.cancel()
+                self.scrub_request = future
+            return None
+
+        self.frame_image = ImageTk.PhotoImage(frame)  # Keep a reference to avoid garbage collection
+        self.gif_label.config(image=self.frame_image)
+        self.displayed_frame = index
+        if read_ahead:
+            self.read_ahead(index)
+        return frame.info.get('duration') or 100
 
 
     def update_gif_frame(self):
         if self.playing:
-            self.gif_label.config(image=self.frames[self.current_frame])
-            self.current_frame = (self.current_frame + 1) % self.frame_count
+            start_time = time.perf_counter()
+            duration = self.show_frame(self.current_frame)
+            if duration is None:
+                # Still being decoded, try again shortly instead of blocking the Tk thread
+                self.play_job = self.root.after(10, self.update_gif_frame)
+                return
             self.frame_slider.set(self.current_frame)
-            self.root.after(100, self.update_gif_frame)  # Adjust delay as needed
+            self.current_frame = (self.current_frame + 1) % self.frame_count
+            # Wait for the rest of the frame's own duration, minus the time spent showing it
+            elapsed = int((time.perf_counter() - start_time) * 1000)
+            self.play_job = self.root.after(max(1, duration - elapsed), self.update_gif_frame)
 
 
     def play_gif(self):
-        if self.frames:
+        if self.frame_count and not self.playing:
             self.playing = True
             self.update_gif_frame()
 
 
     def pause_gif(self):
         self.playing = False
+        if self.play_job is not None:
+            self.root.after_cancel(self.play_job)
+            self.play_job = None
 
 
     def on_slider_move(self, value):
-        if self.frames:
+        # Moves made by playback itself are ignored. A frame that is not cached yet is decoded
+        # in the decoder thread and shown when ready, unless the slider has moved on by then
+        if self.frame_count and int(value) != self.displayed_frame:
             self.current_frame = int(value)
-            self.gif_label.config(image=self.frames[self.current_frame])
+            self.show_frame(self.current_frame, read_ahead=self.playing)
 
 
     def on_create_gif(self):
+        """Queue a GIF job; it runs in the background and reports through poll_jobs."""
         sample_name = self.sample_var.get()
-        min_temp = float(self.min_temp_entry.get())
-        max_temp = float(self.max_temp_entry.get())
-        temp_step = float(self.temp_step_entry.get())
-
-        gif_path = create_gif(sample_name, min_temp, max_temp, temp_step)
-        gif_filename = os.path.basename(gif_path)
-
-        if not os.path.exists('gifs'):
-            os.makedirs('gifs')
-
-        new_gif_path = os.path.join('gifs', gif_filename)
-        os.rename(gif_path, new_gif_path)
+        compare_names = [self.compare_list.get(i) for i in self.compare_list.curselection()]
+        try:
+            min_temp = float(self.min_temp_entry.get())
+            max_temp = float(self.max_temp_entry.get())
+            temp_step = float(self.temp_step_entry.get())
+            fps = float(self.fps_entry.get())
+        except ValueError:
+            self.result_label.config(text="Please enter valid numbers for the temperatures and FPS.")
+            return
+        if not sample_name or temp_step <= 0:
+            self.result_label.config(text="Please select a sample and a positive temperature step.")
+            return
+        if min_temp > max_temp:
+            self.result_label.config(text="The min temperature must not be above the max temperature.")
+            return
+
+        sample_names = [sample_name] + [name for name in compare_names if name != sample_name]
+        job_id = len(self.jobs)
+        cancel_event = threading.Event()
+
+        row = len(self.jobs)
+        tk.Label(self.jobs_frame, text=" vs ".join(sample_names)).grid(row=row, column=0, sticky="w")
+        progress_bar = ttk.Progressbar(self.jobs_frame, length=200, maximum=1)
+        progress_bar.grid(row=row, column=1)
+        status_label = tk.Label(self.jobs_frame, text="Queued")
+        status_label.grid(row=row, column=2, sticky="w")
+        cancel_button = tk.Button(self.jobs_frame, text="Cancel", command=cancel_event.set)
+        cancel_button.grid(row=row, column=3)
+        self.jobs[job_id] = {'progress_bar': progress_bar, 'status_label': status_label,
+                             'cancel_button': cancel_button, 'cancel_event': cancel_event, 'running': True}
+
+        self.job_executor.submit(self.run_job, job_id, sample_names, min_temp, max_temp, temp_step, fps,
+                                 self.format_var.get(), cancel_event)
+        if not self.polling_jobs:
+            self.polling_jobs = True
+            self.root.after(100, self.poll_jobs)
+
+
+    def run_job(self, job_id, sample_names, min_temp, max_temp, temp_step, fps, output_format, cancel_event):
+        """Runs in a job thread; Tk widgets are only updated by poll_jobs on the Tk thread."""
+        def progress(stage, frames_done, frame_count, timings):
+            self.job_updates.put((job_id, 'progress', (stage, frames_done, frame_count, timings)))
 
-        self.result_label.config(text=f"GIF saved as {gif_filename}")
-        self.load_gif_files()
+        try:
+            gif_path = create_animation(sample_names, min_temp, max_temp, temp_step, JOB_WORKERS, fps, output_format,
+                                        progress=progress, cancel_event=cancel_event)
+            os.makedirs('gifs', exist_ok=True)
+            new_gif_path = os.path.join('gifs', os.path.basename(gif_path))
+            os.replace(gif_path, new_gif_path)
+            self.job_updates.put((job_id, 'done', os.path.basename(new_gif_path)))
+        except AnimationCancelled:
+            self.job_updates.put((job_id, 'cancelled', None))
+        except Exception as e:
+            self.job_updates.put((job_id, 'failed', e))
+
+
+    def poll_jobs(self):
+        while True:
+            try:
+                job_id, kind, value = self.job_updates.get_nowait()
+            except queue.Empty:
+                break
+            job = self.jobs[job_id]
+            if kind == 'progress':
+                stage, frames_done, frame_count, timings = value
+                job['status_label'].config(text=self.format_job_status(stage, frames_done, frame_count, timings))
+                job['progress_bar'].config(value=frames_done / frame_count if frame_count else 0)
+                continue
+
+            job['running'] = False
+            job['cancel_button'].config(state="disabled")
+            if kind == 'done':
+                job['progress_bar'].config(value=1)
+                job['status_label'].config(text=f"Saved as {value}")
+                self.result_label.config(text=f"GIF saved as {value}")
+                self.load_gif_files()
+            elif kind == 'cancelled':
+                job['status_label'].config(text="Cancelled")
+            else:
+                job['status_label'].config(text=f"Failed: {value}")
+
+        self.polling_jobs = any(job['running'] for job in self.jobs.values())
+        if self.polling_jobs:
+            self.root.after(100, self.poll_jobs)
+
+
+    def on_close(self):
+        # Stop running and queued jobs instead of waiting for them after the window is gone
+        for job in self.jobs.values():
+            job['cancel_event'].set()
+        self.job_executor.shutdown(wait=False, cancel_futures=True)
+        self.decoder.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+
+    @staticmethod
+    def format_job_status(stage, frames_done, frame_count, timings):
+        stage_times = ", ".join(f"{name} {seconds:.1f} s" for name, seconds in timings.items() if name != stage)
+        if stage != 'frames':
+            status = {'lookup': "Looking up images", 'curves': "Loading curves"}.get(stage, stage)
+        elif frames_done == 0:
+            status = f"Rendering 0/{frame_count}"
+        else:
+            eta = timings['frames'] / frames_done * (frame_count - frames_done)
+            status = f"Rendering {frames_done}/{frame_count}, ETA {eta:.0f} s"
+        return f"{status} ({stage_times})" if stage_times else status
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+# background_loader.py
+import queue
+import threading
+
+_DONE = object()
+
+
+class BackgroundLoader:
+    """Runs a producer in a background thread and hands its items to the Tk thread in batches.
+
+    Tk widgets may only be touched from the thread running mainloop, so the producer puts its
+    items on a queue which is drained every poll_ms through root.after. At most batch_size items
+    are passed to on_items per poll, which keeps the window responsive while thousands of
+    samples are added.
+    """
+
+    def __init__(self, root, batch_size=200, poll_ms=20):
+        self.root = root
+        self.batch_size = batch_size
+        self.poll_ms = poll_ms
+        self.error = None
+        self._queue = queue.Queue()
+
+    def start(self, producer, on_items, on_done=None):
+        """Run producer() in a daemon thread; it must return an iterable of items for on_items."""
+        self._on_items = on_items
+        self._on_done = on_done
+        threading.Thread(target=self._run, args=(producer,), daemon=True).start()
+        self.root.after(self.poll_ms, self._poll)
+
+    def _run(self, producer):
+        try:
+            for item in producer():
+                self._queue.put(item)
+        except Exception as e:
+            self.error = e
+            print(f"Background loading failed: {e}")
+        finally:
+            self._queue.put(_DONE)
+
+    def _poll(self):
+        items = []
+        done = False
+        while len(items) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE:
+                done = True
+                break
+            items.append(item)
+
+        if items:
+            self._on_items(items)
+        if done:
+            if self._on_done is not None:
+                self._on_done()
+        else:
+            self.root.after(self.poll_ms, self._poll)
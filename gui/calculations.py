@@ -1,27 +1,86 @@
 # calculations.py
 import numpy as np
 
-def calculate_intersections(df, x_column, y_column, hline_y, vline_x):
-    y_intersect = None
-    x_intersect = None
+# pandas is only imported by calculate_crossings, so that the window of gui/main.py does not wait
+# for it (see startup_benchmark.py)
 
-    y_data = df[y_column].values
+
+def find_crossings(x_data, y_data, levels):
+    """Find every point where y_data passes through each of the given levels.
+
+    All levels are handled in one vectorized pass over the data. Exact hits count once per
+    plateau, sign changes between two samples are linearly interpolated. Returns the arrays
+    (level_index, row_index, x, direction), ordered by level and then by position in the data;
+    direction is +1 for rising and -1 for falling crossings.
+    """
+    x = np.asarray(x_data, dtype=np.float64)
+    y = np.asarray(y_data, dtype=np.float64)
+    levels = np.atleast_1d(np.asarray(levels, dtype=np.float64))
+
+    sign = np.sign(y[:, None] - levels[None, :])  # (rows, levels), NaN rows never cross
+
+    hit = sign == 0
+    hit[1:] &= sign[:-1] != 0
+    hit_rows, hit_levels = np.nonzero(hit)
+    # The direction of an exact hit compares the sides before the hit and after the plateau it
+    # starts; ending_row is the first row at or after a row that is not on the level (or NaN)
+    rows = np.arange(len(y))[:, None]
+    ending_row = np.minimum.accumulate(np.where(sign != 0, rows, len(y))[::-1], axis=0)[::-1]
+    ending_row = np.vstack([ending_row, np.full((1, len(levels)), len(y))])
+    after = ending_row[hit_rows + 1, hit_levels]
+    previous = np.where(hit_rows > 0, sign[np.maximum(hit_rows - 1, 0), hit_levels], 0)
+    following = np.where(after < len(y), sign[np.minimum(after, len(y) - 1), hit_levels], 0)
+    previous, following = np.nan_to_num(previous), np.nan_to_num(following)
+
+    crossing = sign[:-1] * sign[1:] < 0
+    cross_rows, cross_levels = np.nonzero(crossing)
+    x0, x1 = x[cross_rows], x[cross_rows + 1]
+    y0, y1 = y[cross_rows], y[cross_rows + 1]
+    cross_x = x0 + (levels[cross_levels] - y0) * (x1 - x0) / (y1 - y0)
+
+    level_index = np.concatenate([hit_levels, cross_levels])
+    row_index = np.concatenate([hit_rows, cross_rows])
+    crossing_x = np.concatenate([x[hit_rows], cross_x])
+    direction = np.concatenate([np.sign(following - previous), np.sign(y1 - y0)]).astype(np.int8)
+
+    order = np.lexsort((row_index, level_index))
+    return level_index[order], row_index[order], crossing_x[order], direction[order]
+
+
+def calculate_crossings(samples, x_column, y_column, levels):
+    """Return all crossings of y_column through the levels for many samples as a tidy table.
+
+    samples maps sample names to DataFrames. The result has one row per crossing with the
+    columns Sample, Level, Crossing (0 for the first crossing of that level), x_column and
+    Direction. For crossings of vertical lines swap x_column and y_column.
+    """
+    import pandas as pd
+    levels = np.atleast_1d(np.asarray(levels, dtype=np.float64))
+    tables = []
+    for sample, df in samples.items():
+        level_index, _, crossing_x, direction = find_crossings(df[x_column].values, df[y_column].values, levels)
+        starts = np.searchsorted(level_index, level_index)
+        tables.append(pd.DataFrame({
+            'Sample': sample,
+            'Level': levels[level_index],
+            'Crossing': np.arange(len(level_index)) - starts,
+            x_column: crossing_x,
+            'Direction': direction,
+        }))
+    if not tables:
+        return pd.DataFrame(columns=['Sample', 'Level', 'Crossing', x_column, 'Direction'])
+    return pd.concat(tables, ignore_index=True)
+
+
+def calculate_intersections(df, x_column, y_column, hline_y, vline_x):
+    """Return the x of the first crossing of the horizontal line and the y of the first crossing of the vertical line."""
     x_data = df[x_column].values
+    y_data = df[y_column].values
+
+    _, _, crossings, _ = find_crossings(x_data, y_data, hline_y)
+    x_intersect = crossings[0] if crossings.size > 0 else None
+
+    _, _, crossings, _ = find_crossings(y_data, x_data, vline_x)
+    y_intersect = crossings[0] if crossings.size > 0 else None
 
-    if np.any(y_data == hline_y):
-        x_intersect = df.loc[y_data == hline_y, x_column].values[0]
-    else:
-        indices = np.where(np.diff(np.sign(y_data - hline_y)))[0]
-        if indices.size > 0:
-            idx = indices[0]
-            x_intersect = np.interp(hline_y, [y_data[idx], y_data[idx + 1]], [x_data[idx], x_data[idx + 1]])
-
-    if np.any(x_data == vline_x):
-        y_intersect = df.loc[x_data == vline_x, y_column].values[0]
-    else:
-        indices = np.where(np.diff(np.sign(x_data - vline_x)))[0]
-        if indices.size > 0:
-            idx = indices[0]
-            y_intersect = np.interp(vline_x, [x_data[idx], x_data[idx + 1]], [y_data[idx], y_data[idx + 1]])
-
-    return x_intersect, y_intersect
\ No newline at end of file
+    return x_intersect, y_intersect
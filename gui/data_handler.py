@@ -1,6 +1,11 @@
 # data_handler.py
 import os
-import pandas as pd
+import threading
+from collections import OrderedDict
+
+# pandas and pyarrow are imported inside the functions that need them, so that listing the
+# samples for a window does not pull in the data stack (see startup_benchmark.py)
+
 
 def get_sample_names(data_dir='../data'):
     sample_names = []
@@ -10,4 +15,122 @@ def get_sample_names(data_dir='../data'):
     return sample_names
 
 def load_parquet_file(sample_name, path="../"):
-    return pd.read_parquet(path+"parquet_data/"+sample_name+"_MeasuredValues.parquet")
\ No newline at end of file
+    import pandas as pd
+    return pd.read_parquet(path+"parquet_data/"+sample_name+"_MeasuredValues.parquet")
+
+def read_columns(sample_name, path="../"):
+    """Read the MeasuredValues column names of a sample from the Parquet footer, without loading any rows."""
+    import pyarrow.parquet as pq
+    return pq.read_schema(path + "parquet_data/" + sample_name + "_MeasuredValues.parquet").names
+
+
+class ParquetCache:
+    """LRU cache of Parquet columns, keyed on file path and column and invalidated by file mtime.
+
+    Columns are cached individually so a redraw that switches one axis only loads that column.
+    Least recently used columns are evicted once the cached columns exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._columns = OrderedDict()  # (path, column) -> (mtime_ns, Series, nbytes)
+        self._lock = threading.Lock()
+
+    def load(self, path, columns):
+        import pandas as pd
+        mtime = os.stat(path).st_mtime_ns
+        loaded = {}
+        with self._lock:
+            for column in columns:
+                entry = self._columns.get((path, column))
+                if entry is not None and entry[0] == mtime:
+                    self._columns.move_to_end((path, column))
+                    loaded[column] = entry[1]
+                    self.hits += 1
+        missing = [column for column in dict.fromkeys(columns) if column not in loaded]
+        if missing:
+            df = pd.read_parquet(path, columns=missing)
+            with self._lock:
+                for column in missing:
+                    self._store((path, column), mtime, df[column])
+                    loaded[column] = df[column]
+                    self.misses += 1
+                self._evict()
+        return pd.DataFrame({column: loaded[column] for column in dict.fromkeys(columns)})
+
+    def _store(self, key, mtime, series):
+        old = self._columns.pop(key, None)
+        if old is not None:
+            self.size -= old[2]
+        nbytes = int(series.memory_usage(index=True, deep=True))
+        self._columns[key] = (mtime, series, nbytes)
+        self.size += nbytes
+
+    def _evict(self):
+        while self.size > self.max_bytes and len(self._columns) > 1:
+            _, (_, _, nbytes) = self._columns.popitem(last=False)
+            self.size -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._columns.clear()
+            self.size = 0
+
+
+parquet_cache = ParquetCache()
+
+
+def load_columns(sample_name, columns, path="../"):
+    """Load only the given MeasuredValues columns of a sample through the shared cache."""
+    return parquet_cache.load(path + "parquet_data/" + sample_name + "_MeasuredValues.parquet", columns)
+
+
+_summaries = {}  # path -> (mtime_ns, row dict)
+
+
+def load_summary(sample_name, path="../"):
+    """Load the precomputed characteristic temperatures of a sample as a dict, or None if not ingested yet."""
+    import pyarrow.parquet as pq
+    summary_path = path + "parquet_data/" + sample_name + "_Summary.parquet"
+    try:
+        mtime = os.stat(summary_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _summaries.get(summary_path)
+    if cached is None or cached[0] != mtime:
+        rows = pq.read_table(summary_path).to_pylist()
+        cached = (mtime, rows[0] if rows else {})
+        _summaries[summary_path] = cached
+    return cached[1]
+
+
+def load_contours(sample_name, path="../"):
+    """Load the decoded contours of a sample without going back to the SQLite file.
+
+    Returns (mvids, temperatures, offsets, points): the contour of row i is
+    points[offsets[i]:offsets[i + 1]], an (n, 2) float32 array of x/y pixel coordinates.
+    """
+    import numpy as np
+    import pyarrow.parquet as pq
+    table = pq.read_table(path + "parquet_data/" + sample_name + "_Contour.parquet")
+    x = table.column('X').combine_chunks()
+    y = table.column('Y').combine_chunks()
+    offsets = x.offsets.to_numpy()
+    offsets = offsets - offsets[0]
+    points = np.column_stack([x.flatten().to_numpy(), y.flatten().to_numpy()])
+    return table.column('MVID').to_numpy(), table.column('Temperature').to_numpy(), offsets, points
+
+
+def open_dataset(table_name="MeasuredValues", path="../"):
+    """Open the partitioned dataset of a table for cross-sample queries.
+
+    The partition columns dust_nr, washed and sample can be used for predicate pushdown, e.g.
+    open_dataset().to_table(columns=["sample", "Temperature", "HeightPercent"],
+                            filter=(pyarrow.dataset.field("washed") == 0)
+                            & (pyarrow.dataset.field("Temperature") >= 1200))
+    """
+    import pyarrow.dataset as ds
+    return ds.dataset(path + "parquet_dataset/" + table_name, format="parquet", partitioning="hive")
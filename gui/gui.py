@@ -2,17 +2,17 @@
 import json
 import os
 
-from customtkinter import CTk, CTkLabel, CTkOptionMenu, CTkEntry, CTkFrame, CTkScrollbar, CTkButton
+from customtkinter import CTk, CTkLabel, CTkOptionMenu, CTkEntry, CTkFrame, CTkScrollbar, CTkButton, CTkCheckBox
 from tkinter import BooleanVar, StringVar
 from tkinter import ttk
 import customtkinter
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 
 from plot_style_popup import PlotStylePopup
 
 customtkinter.set_default_color_theme("h2-lab.json")
 
+TREE_ROWS = 20  # Visible rows of the sample treeview, the only samples that are Tk items (see render_tree)
+
 
 # gui.py
 class GUIManager:
@@ -30,26 +30,25 @@ class GUIManager:
         self.plot_frame = CTkFrame(self.root)
         self.plot_frame.pack(side="right", fill="both", expand=True)
 
-        self.fig, self.ax = plt.subplots()
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
-        self.canvas.get_tk_widget().pack(fill="both", expand=True)
-
         self.x_var = StringVar(self.root)
         self.y_var = StringVar(self.root)
         self.x_var.set("Temperature")
         self.y_var.set("HeightPercent")
 
         CTkLabel(self.control_frame, text="X-axis:").grid(row=0, column=0, sticky='w', pady=5)
-        CTkOptionMenu(self.control_frame, variable=self.x_var, command=lambda _: self.plot_callback(),
-                      values=columns).grid(row=0, column=1, sticky='w')
+        self.x_menu = CTkOptionMenu(self.control_frame, variable=self.x_var, command=lambda _: self.plot_callback(),
+                                    values=list(columns))
+        self.x_menu.grid(row=0, column=1, sticky='w')
 
         CTkLabel(self.control_frame, text="Y-axis:").grid(row=1, column=0, sticky='w')
-        CTkOptionMenu(self.control_frame, variable=self.y_var, command=lambda _: self.plot_callback(),
-                      values=columns).grid(row=1, column=1, sticky='w')
+        self.y_menu = CTkOptionMenu(self.control_frame, variable=self.y_var, command=lambda _: self.plot_callback(),
+                                    values=list(columns))
+        self.y_menu.grid(row=1, column=1, sticky='w')
 
         self.tree_frame = CTkFrame(self.control_frame)
         self.tree_frame.grid(row=2, column=0, columnspan=2, pady=5)
-        self.tree = ttk.Treeview(self.tree_frame, columns=("Sample", "Select", "X", "Y"), show='headings')
+        self.tree = ttk.Treeview(self.tree_frame, columns=("Sample", "Select", "X", "Y"), show='headings',
+                                 height=TREE_ROWS)
         self.tree.heading("Sample", text="Sample")
         self.tree.heading("Select", text="Select")
         self.tree.heading("X", text="X")
@@ -59,16 +58,20 @@ class GUIManager:
         self.tree.column("X", width=50)
         self.tree.column("Y", width=50)
 
-        vsb = CTkScrollbar(self.tree_frame, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        vsb.pack(side='right', fill='y')
+        # The treeview is virtual: it only holds the TREE_ROWS samples from first_row on and is
+        # rendered again from sample_names and tree_values when scrolled, so thousands of samples
+        # cost no more than a screenful
+        self.first_row = 0
+        self.tree_values = {}  # sample -> {column: value} of the X and Y columns
+        self.tree_scrollbar = CTkScrollbar(self.tree_frame, command=self.scroll_tree)
+        self.tree_scrollbar.pack(side='right', fill='y')
         self.tree.pack(side='left', fill='y')
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_tree('scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_tree('scroll', -1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_tree('scroll', 1, 'units'))
 
-        self.experiment_vars = {}
-        for sample in sample_names:
-            var = BooleanVar()
-            self.experiment_vars[sample] = var
-            self.tree.insert("", "end", values=(sample, ""), tags=(sample,))
+        self.experiment_vars = {sample: BooleanVar() for sample in sample_names}
+        self.render_tree()
 
         self.tree.bind('<<TreeviewSelect>>', self.toggle_var)
 
@@ -116,9 +119,64 @@ class GUIManager:
         self.style_button = CTkButton(self.control_frame, text="Plot Style Configuration", command=self.open_style_popup)
         self.style_button.grid(row=9, columnspan=2, pady=10)
 
+        # When checked, the guide lines can be dragged with the mouse instead of typing their position
+        self.drag_lines_var = BooleanVar(value=False)
+        CTkCheckBox(self.control_frame, text="Drag guide lines", variable=self.drag_lines_var).grid(
+            row=10, columnspan=2, pady=5)
+
         self.plot_style_popup = None
         self.bind_entries()
 
+        # The controls are shown before matplotlib is imported, which takes most of the startup
+        # time (see startup_benchmark.py); the plot is added to plot_frame right after
+        self.root.update()
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        self.fig = Figure()
+        self.ax = self.fig.add_subplot()
+        self.canvas = FigureCanvasTkAgg(self.fig, master=self.plot_frame)
+        self.canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def set_columns(self, columns):
+        """Fill the axis menus once the column names are known (they may be loaded after the window opened)."""
+        self.x_menu.configure(values=list(columns))
+        self.y_menu.configure(values=list(columns))
+
+    def add_samples(self, sample_names):
+        """Append samples to the treeview, e.g. batch by batch while the sample list is still being loaded."""
+        new_samples = [sample for sample in sample_names if sample not in self.experiment_vars]
+        for sample in new_samples:
+            self.experiment_vars[sample] = BooleanVar()
+            self.sample_names.append(sample)
+        self.render_tree()
+        self.styles.update(self.init_styles([sample for sample in new_samples if sample not in self.styles]))
+
+    def render_tree(self):
+        """Show the TREE_ROWS samples from first_row on in the treeview and update the scrollbar."""
+        self.first_row = max(0, min(self.first_row, len(self.sample_names) - TREE_ROWS))
+        self.tree.delete(*self.tree.get_children())
+        for sample in self.sample_names[self.first_row:self.first_row + TREE_ROWS]:
+            values = self.tree_values.get(sample, {})
+            self.tree.insert("", "end", iid=sample, tags=(sample,), values=(
+                sample, 'x' if self.experiment_vars[sample].get() else '', values.get("X", ''), values.get("Y", '')))
+        total = max(len(self.sample_names), 1)
+        self.tree_scrollbar.set(self.first_row / total, min(self.first_row + TREE_ROWS, total) / total)
+
+    def scroll_tree(self, action, amount, unit='units'):
+        """Scrollbar command (moveto fraction, or scroll n units/pages) moving the visible rows."""
+        if action == 'moveto':
+            self.first_row = round(float(amount) * len(self.sample_names))
+        else:
+            self.first_row += int(float(amount)) * (TREE_ROWS if unit == 'pages' else 1)
+        self.render_tree()
+        return "break"
+
+    def set_tree_value(self, sample, column, value):
+        """Set the X or Y column of a sample, which is shown whenever its row is visible."""
+        self.tree_values.setdefault(sample, {})[column] = value
+        if self.tree.exists(sample):
+            self.tree.set(sample, column, value)
+
     def init_styles(self, sample_names):
         styles = {}
         for sample in sample_names:
@@ -168,7 +226,10 @@ class GUIManager:
         self.y_label_entry.bind("<Return>", lambda event: self.plot_callback())
 
     def toggle_var(self, event):
-        item = self.tree.selection()[0]
+        selection = self.tree.selection()
+        if not selection:  # The selected row was scrolled out of the treeview
+            return
+        item = selection[0]
         sample = self.tree.item(item, "values")[0]
         var = self.experiment_vars[sample]
         var.set(not var.get())
@@ -179,6 +240,7 @@ class GUIManager:
             self.tree.set(item, column="Select", value='')
             self.tree.set(item, column="X", value='')
             self.tree.set(item, column="Y", value='')
+            self.tree_values.pop(sample, None)
             self.tree.tag_configure(sample, background='white')
 
         self.plot_callback()
\ No newline at end of file
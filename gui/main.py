@@ -1,29 +1,46 @@
 # main.py
-from data_handler import get_sample_names, load_parquet_file
+from data_handler import get_sample_names, read_columns
 from calculations import calculate_intersections
-from plotter import plot
+from background_loader import BackgroundLoader
+from plotter import Plotter
 from gui import GUIManager
 
 def main():
-    sample_names = get_sample_names()
-    parquet_file = f"{sample_names[0]}"
-    df = load_parquet_file(parquet_file)
-    columns = df.columns
-
     def plot_callback():
-        plot(df, gui_manager, calculate_intersections, set_treeview_value)
+        plotter.plot()
 
     def set_treeview_value(sample_value, column, set_value):
-        for row in gui_manager.tree.get_children():
-            row_values = gui_manager.tree.item(row, "values")
-            if row_values[0] == sample_value:
-                gui_manager.tree.set(row, column, set_value)
-                break
+        gui_manager.set_tree_value(sample_value, column, set_value)
+
+    # The window opens with empty lists; sample names and column names (Parquet footer only)
+    # are loaded in a background thread and added batch by batch
+    def load_metadata():
+        sample_names = sorted(get_sample_names())
+        for sample in sample_names:
+            yield "sample", sample
+        # Samples that have not been converted to Parquet yet are skipped
+        for sample in sample_names:
+            try:
+                columns = read_columns(sample)
+            except (OSError, ValueError):
+                continue
+            yield "columns", columns
+            return
+        print("No sample with a MeasuredValues Parquet file found, the axis menus stay empty")
+
+    def on_metadata(items):
+        samples = [value for kind, value in items if kind == "sample"]
+        for kind, value in items:
+            if kind == "columns":
+                gui_manager.set_columns(value)
+        gui_manager.add_samples(samples)
 
-    gui_manager = GUIManager(columns, plot_callback, sample_names)
+    gui_manager = GUIManager([], plot_callback, [])
+    plotter = Plotter(gui_manager, calculate_intersections, set_treeview_value)
+    BackgroundLoader(gui_manager.root).start(load_metadata, on_metadata)
 
     plot_callback()
     gui_manager.root.mainloop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
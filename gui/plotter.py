@@ -1,48 +1,229 @@
-# plotter.py (modifications)
+# plotter.py
 from tkinter import StringVar
 
-import pandas as pd
+import math
 
+from data_handler import load_columns, load_summary
 
-def plot(df, gui_manager, calculate_intersections, set_treeview_value):
-    ax = gui_manager.ax
-    canvas = gui_manager.canvas
 
-    ax.clear()
+class Plotter:
+    """Keeps one Line2D per selected sample and only updates the artists affected by a change.
 
-    styles = gui_manager.plot_style_popup.get_styles() if gui_manager.plot_style_popup else {}
+    Axis column changes reload the line data, guide line changes only move the guide lines and
+    intersection markers, and selection toggles add or remove the artists of a single sample.
+    """
 
-    for sample, var in gui_manager.experiment_vars.items():
-        if var.get():
-            parquet_file = f"../parquet_data/{sample}_MeasuredValues.parquet"
-            df = pd.read_parquet(parquet_file)
-            v_intersect, h_intersect = calculate_intersections(
-                df, gui_manager.x_var.get(), gui_manager.y_var.get(),
-                float(gui_manager.hline_y_var.get()), float(gui_manager.vline_x_var.get())
-            )
+    def __init__(self, gui_manager, calculate_intersections, set_treeview_value):
+        self.gui_manager = gui_manager
+        self.calculate_intersections = calculate_intersections
+        self.set_treeview_value = set_treeview_value
 
-            style = styles.get(sample, {
-                "Color": StringVar(value="C0"), "Linestyle": StringVar(value="solid"), "Alpha": StringVar(value="1.0"), "Linewidth": StringVar(value="1.0"), "Legend-Label": StringVar(value=sample)})
-            ax.plot(df[gui_manager.x_var.get()], df[gui_manager.y_var.get()], label=style["Legend-Label"].get(),
-                    color=style["Color"].get(), linestyle=style["Linestyle"].get(), linewidth=float(style["Linewidth"].get()), alpha=float(style["Alpha"].get()))
+        self.lines = {}  # sample -> Line2D
+        self.markers = {}  # sample -> (marker on the vertical line, marker on the horizontal line)
+        self.data = {}  # sample -> DataFrame with the x and y column
+        self.line_styles = {}  # sample -> style tuple the line was drawn with
+        self.intersections = {}  # sample -> guide positions the markers were computed for
+        self.columns = None
+        self.legend_styles = None  # Styles of the lines the legend was built from
 
-            if h_intersect is not None:
-                ax.scatter([float(gui_manager.vline_x_var.get())], [h_intersect])
-                set_treeview_value(sample, "Y", f"{h_intersect:.1f}")
+        ax = gui_manager.ax
+        self.hline = ax.axhline(y=0, color='r', linestyle='--')
+        self.vline = ax.axvline(x=0, color='b', linestyle='--')
 
-            if v_intersect is not None:
-                ax.scatter([v_intersect], [float(gui_manager.hline_y_var.get())])
-                set_treeview_value(sample, "X", f"{v_intersect:.1f}")
+        # Guide line dragging, see on_press/on_motion/on_release
+        self.dragging = None
+        self.background = None
+        gui_manager.canvas.mpl_connect('button_press_event', self.on_press)
+        gui_manager.canvas.mpl_connect('motion_notify_event', self.on_motion)
+        gui_manager.canvas.mpl_connect('button_release_event', self.on_release)
 
-    if gui_manager.y_var.get() == "HeightPercent":
-        ax.axhline(y=float(gui_manager.hline_y_var.get()), color='r', linestyle='--')
+    def get_style(self, sample):
+        styles = self.gui_manager.plot_style_popup.get_styles() if self.gui_manager.plot_style_popup else {}
+        style = styles.get(sample, {
+            "Color": StringVar(value="C0"), "Linestyle": StringVar(value="solid"), "Alpha": StringVar(value="1.0"),
+            "Linewidth": StringVar(value="1.0"), "Legend-Label": StringVar(value=sample)})
+        return (style["Legend-Label"].get(), style["Color"].get(), style["Linestyle"].get(),
+                float(style["Linewidth"].get()), float(style["Alpha"].get()))
 
-    if gui_manager.x_var.get() == "Temperature":
-        ax.axvline(x=float(gui_manager.vline_x_var.get()), color='b', linestyle='--')
+    def add_sample(self, sample):
+        ax = self.gui_manager.ax
+        self.lines[sample], = ax.plot([], [])
+        self.markers[sample] = (ax.plot([], [], 'o')[0], ax.plot([], [], 'o')[0])
 
-    ax.set_xlabel(gui_manager.x_label_var.get())
-    ax.set_ylabel(gui_manager.y_label_var.get())
-    ax.set_xlim(float(gui_manager.x_min_var.get()), float(gui_manager.x_max_var.get()))
-    ax.set_ylim(float(gui_manager.y_min_var.get()), float(gui_manager.y_max_var.get()))
-    ax.legend()
-    canvas.draw()
\ No newline at end of file
+    def remove_sample(self, sample):
+        self.lines.pop(sample).remove()
+        for marker in self.markers.pop(sample):
+            marker.remove()
+        self.data.pop(sample, None)
+        self.line_styles.pop(sample, None)
+        self.intersections.pop(sample, None)
+
+    def update_data(self, sample, x_column, y_column):
+        df = load_columns(sample, [x_column, y_column])
+        self.data[sample] = df
+        self.lines[sample].set_data(df[x_column].values, df[y_column].values)
+        self.intersections.pop(sample, None)
+
+    def update_style(self, sample):
+        style = self.get_style(sample)
+        if self.line_styles.get(sample) != style:
+            label, color, linestyle, linewidth, alpha = style
+            self.lines[sample].set(label=label, color=color, linestyle=linestyle, linewidth=linewidth, alpha=alpha)
+            for marker in self.markers[sample]:
+                marker.set_color(color)
+            self.line_styles[sample] = style
+
+    def update_intersections(self, sample, x_column, y_column, hline_y, vline_x):
+        if self.intersections.get(sample) == (hline_y, vline_x):
+            return
+        intersections = self.lookup_summary(sample, x_column, y_column, hline_y, vline_x)
+        if intersections is None:
+            intersections = self.calculate_intersections(self.data[sample], x_column, y_column, hline_y, vline_x)
+        v_intersect, h_intersect = intersections
+        vertical_marker, horizontal_marker = self.markers[sample]
+
+        if h_intersect is not None:
+            vertical_marker.set_data([vline_x], [h_intersect])
+            self.set_treeview_value(sample, "Y", f"{h_intersect:.1f}")
+        else:
+            vertical_marker.set_data([], [])
+            self.set_treeview_value(sample, "Y", "")
+
+        if v_intersect is not None:
+            horizontal_marker.set_data([v_intersect], [hline_y])
+            self.set_treeview_value(sample, "X", f"{v_intersect:.1f}")
+        else:
+            horizontal_marker.set_data([], [])
+            self.set_treeview_value(sample, "X", "")
+
+        self.intersections[sample] = (hline_y, vline_x)
+
+    def lookup_summary(self, sample, x_column, y_column, hline_y, vline_x):
+        """Read the intersections from the summary written at ingest time, None if they are not stored there."""
+        if (x_column, y_column) != ("Temperature", "HeightPercent"):
+            return None
+        summary = load_summary(sample)
+        v_column = f"Temperature@HeightPercent{hline_y:g}"
+        h_column = f"HeightPercent@{vline_x:g}"
+        if not summary or v_column not in summary or h_column not in summary:
+            return None
+        return tuple(None if value is None or math.isnan(value) else value
+                     for value in (summary[v_column], summary[h_column]))
+
+    def plot(self):
+        gui_manager = self.gui_manager
+        ax = gui_manager.ax
+        x_column = gui_manager.x_var.get()
+        y_column = gui_manager.y_var.get()
+        hline_y = float(gui_manager.hline_y_var.get())
+        vline_x = float(gui_manager.vline_x_var.get())
+
+        selected = [sample for sample, var in gui_manager.experiment_vars.items() if var.get()]
+
+        for sample in set(self.lines) - set(selected):
+            self.remove_sample(sample)
+
+        columns_changed = self.columns != (x_column, y_column)
+        self.columns = (x_column, y_column)
+
+        for sample in selected:
+            if sample not in self.lines:
+                self.add_sample(sample)
+                self.update_data(sample, x_column, y_column)
+            elif columns_changed:
+                self.update_data(sample, x_column, y_column)
+            self.update_style(sample)
+            self.update_intersections(sample, x_column, y_column, hline_y, vline_x)
+
+        self.hline.set_ydata([hline_y, hline_y])
+        self.hline.set_visible(y_column == "HeightPercent")
+        self.vline.set_xdata([vline_x, vline_x])
+        self.vline.set_visible(x_column == "Temperature")
+
+        ax.set_xlabel(gui_manager.x_label_var.get())
+        ax.set_ylabel(gui_manager.y_label_var.get())
+        ax.set_xlim(float(gui_manager.x_min_var.get()), float(gui_manager.x_max_var.get()))
+        ax.set_ylim(float(gui_manager.y_min_var.get()), float(gui_manager.y_max_var.get()))
+
+        # The legend copies the color, linestyle, width and alpha of its lines when it is created,
+        # so it is rebuilt whenever any of them changes, not only the labels
+        legend_styles = [self.line_styles[sample] for sample in selected]
+        if legend_styles != self.legend_styles:
+            if ax.get_legend() is not None:
+                ax.get_legend().remove()
+            if selected:
+                ax.legend(handles=[self.lines[sample] for sample in selected])
+            self.legend_styles = legend_styles
+
+        gui_manager.canvas.draw_idle()
+
+    def on_press(self, event, pick_radius=5):
+        """Start dragging the guide line under the mouse; the static curves are cached as background."""
+        gui_manager = self.gui_manager
+        ax = gui_manager.ax
+        if not gui_manager.drag_lines_var.get() or event.inaxes is not ax or event.button != 1:
+            return
+
+        hline_y = float(gui_manager.hline_y_var.get())
+        vline_x = float(gui_manager.vline_x_var.get())
+        line_x, line_y = ax.transData.transform((vline_x, hline_y))
+        if self.vline.get_visible() and abs(event.x - line_x) <= pick_radius:
+            self.dragging = self.vline
+        elif self.hline.get_visible() and abs(event.y - line_y) <= pick_radius:
+            self.dragging = self.hline
+        else:
+            return
+
+        for artist in self.get_animated_artists():
+            artist.set_animated(True)
+        gui_manager.canvas.draw()
+        self.background = gui_manager.canvas.copy_from_bbox(ax.bbox)
+        self.blit()
+
+    def on_motion(self, event):
+        """Move the dragged guide line and recompute the intersections without redrawing the curves."""
+        gui_manager = self.gui_manager
+        if self.dragging is None or event.inaxes is not gui_manager.ax:
+            return
+
+        if self.dragging is self.vline:
+            self.vline.set_xdata([event.xdata, event.xdata])
+            hline_y, vline_x = float(gui_manager.hline_y_var.get()), event.xdata
+        else:
+            self.hline.set_ydata([event.ydata, event.ydata])
+            hline_y, vline_x = event.ydata, float(gui_manager.vline_x_var.get())
+
+        x_column, y_column = self.columns
+        for sample in self.lines:
+            self.update_intersections(sample, x_column, y_column, hline_y, vline_x)
+        self.blit()
+
+    def on_release(self, event):
+        """Write the final guide line position back to its entry and return to normal drawing."""
+        if self.dragging is None:
+            return
+        gui_manager = self.gui_manager
+        if self.dragging is self.vline:
+            gui_manager.vline_x_var.set(f"{self.vline.get_xdata()[0]:.1f}")
+        else:
+            gui_manager.hline_y_var.set(f"{self.hline.get_ydata()[0]:.1f}")
+
+        for artist in self.get_animated_artists():
+            artist.set_animated(False)
+        self.dragging = None
+        self.background = None
+        self.plot()
+
+    def get_animated_artists(self):
+        artists = [self.dragging]
+        for markers in self.markers.values():
+            artists.extend(markers)
+        return artists
+
+    def blit(self):
+        canvas = self.gui_manager.canvas
+        ax = self.gui_manager.ax
+        canvas.restore_region(self.background)
+        for artist in self.get_animated_artists():
+            ax.draw_artist(artist)
+        canvas.blit(ax.bbox)
@@ -0,0 +1,98 @@
+import threading
+from collections import OrderedDict
+
+
+class ImageCache:
+    """LRU cache of decoded PIL images with a byte budget, shared by the image viewer and the GIF creator.
+
+    The decoded full-resolution image of a key is stored separately from its display-size
+    derivatives, so a layout change only resizes the cached source instead of decoding the
+    file again. Sources and derivatives are evicted together in least recently used order
+    once the cached images exceed max_bytes. Safe to use from worker threads; PhotoImages
+    must still be created on the Tk thread from the returned PIL images.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._images = OrderedDict()  # (key, width or None for the source) -> (PIL image, nbytes)
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """Return the full-resolution image of key, calling load() to decode it on a miss."""
+        image = self._lookup((key, None))
+        if image is None:
+            image = load()
+            if image is not None:
+                self._store((key, None), image)
+        return image
+
+    def get_resized(self, key, width, load):
+        """Return the image of key scaled to width (keeping the aspect ratio), derived from the cached source."""
+        image = self._lookup((key, width))
+        if image is None:
+            source = self.get(key, load)
+            if source is None:
+                return None
+            image = resize_to_width(source, width)
+            self._store((key, width), image)
+        return image
+
+    def put(self, key, image):
+        """Store an already decoded full-resolution image for key."""
+        self._store((key, None), image)
+
+    def peek(self, key, width=None):
+        """Return the cached image of key (the source for width None) without loading it, or None."""
+        return self._lookup((key, width), count=False)
+
+    def _lookup(self, cache_key, count=True):
+        with self._lock:
+            entry = self._images.get(cache_key)
+            if entry is not None:
+                self._images.move_to_end(cache_key)
+            if count:
+                if entry is not None:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return entry[0] if entry is not None else None
+
+    def _store(self, cache_key, image):
+        nbytes = image.width * image.height * len(image.getbands())
+        with self._lock:
+            old = self._images.pop(cache_key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._images[cache_key] = (image, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self._images) > 1:
+                _, (_, evicted_bytes) = self._images.popitem(last=False)
+                self.size -= evicted_bytes
+
+    def discard(self, key):
+        """Remove the source and all derivatives of key, e.g. after the file on disk changed."""
+        with self._lock:
+            for cache_key in [cache_key for cache_key in self._images if cache_key[0] == key]:
+                self.size -= self._images.pop(cache_key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'images': len(self._images), 'bytes': self.size}
+
+
+def resize_to_width(image, width):
+    """Scale a PIL image to the given width, keeping its aspect ratio."""
+    from PIL import Image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+image_cache = ImageCache()
@@ -1,11 +1,19 @@
 import os
+import queue
 import time
-from tkinter import Tk, Label, StringVar, Entry, Checkbutton, BooleanVar, Frame, Canvas, Scrollbar, VERTICAL, \
-    HORIZONTAL, Scale, OptionMenu, IntVar
-from PIL import Image, ImageTk
-from picture_for_temperature import process_folder
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import Tk, Label, StringVar, Entry, Listbox, Frame, Canvas, Scrollbar, VERTICAL, HORIZONTAL, Scale, \
+    OptionMenu, IntVar, MULTIPLE, Button
+
+from gui.background_loader import BackgroundLoader
+from image_cache import image_cache
+
+# Neighbouring temperatures prepared in the background, matching the Left/Right key step
+PREFETCH_STEP = 20
+PREFETCH_DEPTH = 2  # Steps ahead in each direction
+PREFETCH_MAX_IMAGES = 24  # Upper limit of prefetched images per temperature change
+
 
-previous_num_images_per_row = None
 def get_sample_names():
     sample_names = []
     for folder in os.listdir('data'):
@@ -14,10 +22,35 @@ def get_sample_names():
     return sample_names
 
 
-def main():
-    sample_names = get_sample_names()
-    image_cache = {}  # Cache to store loaded images
+def load_source_image(sample, temp):
+    """Return the annotated image of a sample at temp at full resolution, or None; rendered in memory."""
+    from picture_for_temperature import render_image_at_temperature
+
+    img = render_image_at_temperature('data', temp, sample)
+    if img is None:
+        print(f"No image found for {sample} at {temp} °C")
+    return img
+
 
+def export_image(sample, temp):
+    """Write the annotated image of a sample at temp to selected_images/{temp}/."""
+    from picture_for_temperature import process_folder
+    process_folder('data', temp, sample, force=True, target_format='JPEG')
+
+
+def prepare_image(sample, temp, img_width):
+    """Return the image of a sample at temp resized to img_width, or None.
+
+    Runs in a worker thread, so it only uses PIL and must not touch any Tk object. The decoded
+    source stays in the image cache, so a later layout change only needs a resize.
+    """
+    process_start_time = time.time()
+    img = image_cache.get_resized((sample, temp), img_width, lambda: load_source_image(sample, temp))
+    print(f"Preparing image for {sample} at {temp} °C took {time.time() - process_start_time:.2f} seconds")
+    return img
+
+
+def main():
     root = Tk()#
     root.title("Image Loader")
     root.state('zoomed')  # Start maximized
@@ -79,37 +112,43 @@ def main():
     Label(control_frame, text="Images per Row:").pack()
     OptionMenu(control_frame, num_images_var, *range(1, 7), command=lambda _: load_images()).pack()
 
-    # Create a canvas for the checkboxes
-    checkbox_canvas = Canvas(control_frame, height=300)
-    checkbox_canvas.pack(side="left", fill="y", expand=True)
+    # Images are rendered in memory for display; only this button writes them to selected_images/
+    Button(control_frame, text="Export Images", command=lambda: export_images()).pack(pady=5)
 
-    scrollbar = Scrollbar(control_frame, orient=VERTICAL, command=checkbox_canvas.yview)
-    scrollbar.pack(side="right", fill="y")
-
-    checkbox_frame = Frame(checkbox_canvas)
-    checkbox_canvas.create_window((0, 0), window=checkbox_frame, anchor='nw')
+    # Samples are listed in a Listbox, which only draws the visible rows and so stays fast for
+    # thousands of samples; the folder names are read in a background thread and added in batches
+    sample_list = Listbox(control_frame, selectmode=MULTIPLE, exportselection=False, height=20)
+    sample_list.pack(side="left", fill="y", expand=True)
 
-    experiment_vars = {}
-    for sample in sample_names:
-        var = BooleanVar()
-        experiment_vars[sample] = var
-        Checkbutton(checkbox_frame, text=sample, variable=var, command=lambda: load_images()).pack(anchor='w')
+    scrollbar = Scrollbar(control_frame, orient=VERTICAL, command=sample_list.yview)
+    scrollbar.pack(side="right", fill="y")
+    sample_list.configure(yscrollcommand=scrollbar.set)
+    sample_list.bind("<<ListboxSelect>>", lambda event: load_images())
 
-    checkbox_canvas.configure(yscrollcommand=scrollbar.set)
-    checkbox_frame.bind("<Configure>", lambda e: checkbox_canvas.configure(scrollregion=checkbox_canvas.bbox("all")))
+    BackgroundLoader(root).start(lambda: sorted(get_sample_names()),
+                                 lambda samples: sample_list.insert("end", *samples))
 
+    executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+    finished = queue.Queue()  # (image_key, (sample, temp), Future) posted when a job is done or cancelled
+    pending = {}  # image_key -> Future of the images that are being prepared
+    slots = {}  # image_key -> Label showing that image at the current temperature
+    unavailable = set()  # (sample, temp) without an image, not requested again
+    polling = False
+    previous_temp = None
 
     def load_images():
+        # Imported on first use so the window appears without waiting for PIL
+        from PIL import ImageTk
+
         start_time = time.time()
 
         # Clear existing widgets
         for widget in image_frame.winfo_children():
             if isinstance(widget, Label) and widget.cget("text") != "Images at Specified Temperature":
                 widget.destroy()
-        print(f"Clearing widgets took {time.time() - start_time:.2f} seconds")
+        slots.clear()
 
         Label(image_frame, text="Images at Specified Temperature").grid(row=0, column=0, columnspan=6)
-        print(f"Adding title took {time.time() - start_time:.2f} seconds")
 
         try:
             temp = int(temp_var.get())
@@ -119,61 +158,126 @@ def main():
 
         num_images_per_row = num_images_var.get()
 
-        # Clear image cache when layout changes
-        global previous_num_images_per_row
-        if num_images_per_row != previous_num_images_per_row:
-            image_cache.clear()
-            previous_num_images_per_row = num_images_per_row
-            print("Cleared image cache due to layout change")
-
         canvas_width = image_canvas.winfo_width()
         if canvas_width == 1:  # If canvas width is not calculated yet
             root.update_idletasks()
             canvas_width = image_canvas.winfo_width()
         img_width = canvas_width // num_images_per_row
-        print(f"Calculating image dimensions took {time.time() - start_time:.2f} seconds")
-
-        row = 1
-        col = 0
-        for sample, var in experiment_vars.items():
-            if var.get():
-                image_key = f"{sample}_{temp}"
-                if image_key not in image_cache:
-                    try:
-                        process_start_time = time.time()
-                        process_folder('data', temp, sample, force=False, target_format='JPEG')
-                        print(f"Processing folder for {sample} took {time.time() - process_start_time:.2f} seconds")
-
-                        image_path = f'selected_images/{temp}/{sample}.jpeg'
-                        if os.path.exists(image_path):
-                            img = Image.open(image_path)
-                            img_ratio = img.width / img.height
-                            img_height = int(img_width / img_ratio)
-                            img = img.resize((img_width, img_height))  # Resize for display
-                            img_tk = ImageTk.PhotoImage(img)
-                            image_cache[image_key] = img_tk
-                            print(
-                                f"Loading and caching image for {sample} took {time.time() - process_start_time:.2f} seconds")
-                        else:
-                            print(f"Image file not found for {sample}: {image_path}")
-                    except Exception as e:
-                        print(f"Error loading image for {sample}: {e}")
-
-                if image_key in image_cache:
-                    img_label = Label(image_frame, image=image_cache[image_key])
-                    img_label.image = image_cache[image_key]  # Keep a reference to avoid garbage collection
-                    img_label.grid(row=row, column=col)
-                    col += 1
-                    if col == num_images_per_row:
-                        col = 0
-                        row += 1
+
+        selected = [sample_list.get(i) for i in sample_list.curselection()]
+        prefetch = get_prefetch_temperatures(temp, len(selected))
+        wanted = {f"{sample}_{t}_{img_width}" for t in [temp] + prefetch for sample in selected}
+
+        # Drop queued work for temperatures the user has already stepped past; work that is
+        # already running finishes and is cached, but is no longer shown
+        for image_key, future in list(pending.items()):
+            if image_key not in wanted and future.cancel():
+                del pending[image_key]
+
+        for i, sample in enumerate(selected):
+            image_key = f"{sample}_{temp}_{img_width}"
+            row, col = 1 + i // num_images_per_row, i % num_images_per_row
+            img = image_cache.peek((sample, temp), img_width)
+            if img is not None:
+                img_tk = ImageTk.PhotoImage(img)
+                img_label = Label(image_frame, image=img_tk)
+                img_label.image = img_tk  # Keep a reference to avoid garbage collection
+            elif (sample, temp) in unavailable:
+                img_label = Label(image_frame, text=f"No image for {sample}")
+            else:
+                img_label = Label(image_frame, text=f"Loading {sample}...")
+                slots[image_key] = img_label
+                if image_key not in pending:
+                    submit(image_key, sample, temp, img_width)
+            img_label.grid(row=row, column=col)
+
+        # The workers pick jobs up in submission order, so the neighbouring temperatures are only
+        # prepared once the images that are shown have been started
+        for prefetch_temp in prefetch:
+            for sample in selected:
+                image_key = f"{sample}_{prefetch_temp}_{img_width}"
+                if (image_key not in pending and (sample, prefetch_temp) not in unavailable
+                        and image_cache.peek((sample, prefetch_temp), img_width) is None):
+                    submit(image_key, sample, prefetch_temp, img_width)
 
         image_frame.update_idletasks()
         image_canvas.config(scrollregion=image_canvas.bbox("all"))
-        print(f"Total load_images execution time: {time.time() - start_time:.2f} seconds")
-        previous_num_images_per_row = num_images_var.get()
+        print(f"Total load_images execution time: {time.time() - start_time:.2f} seconds, "
+              f"image cache: {image_cache.stats()}")
+
+    def export_images():
+        try:
+            temp = int(temp_var.get())
+        except ValueError:
+            print("Invalid temperature value. Please enter a valid number.")
+            return
+        for sample in [sample_list.get(i) for i in sample_list.curselection()]:
+            executor.submit(export_image, sample, temp)
+
+    def get_prefetch_temperatures(temp, num_samples):
+        """Temperatures the user is likely to step to next, nearest first and in the last step direction first."""
+        nonlocal previous_temp
+        direction = -1 if previous_temp is not None and temp < previous_temp else 1
+        previous_temp = temp
+        max_temperatures = PREFETCH_MAX_IMAGES // max(num_samples, 1)
+        temperatures = []
+        for step in range(1, PREFETCH_DEPTH + 1):
+            for sign in (direction, -direction):
+                prefetch_temp = temp + sign * step * PREFETCH_STEP
+                if 0 <= prefetch_temp <= 1600 and len(temperatures) < max_temperatures:
+                    temperatures.append(prefetch_temp)
+        return temperatures
+
+    def submit(image_key, sample, temp, img_width):
+        future = executor.submit(prepare_image, sample, temp, img_width)
+        pending[image_key] = future
+        future.add_done_callback(lambda f: finished.put((image_key, (sample, temp), f)))
+        nonlocal polling
+        if not polling:
+            polling = True
+            root.after(50, show_finished)
+
+    def show_finished():
+        """Turn the images prepared by the workers into PhotoImages; Tk objects must be created on this thread."""
+        from PIL import ImageTk
+        nonlocal polling
+        while True:
+            try:
+                image_key, source_key, future = finished.get_nowait()
+            except queue.Empty:
+                break
+            # The key may have been cancelled and submitted again meanwhile, keep the newer job
+            if pending.get(image_key) is future:
+                del pending[image_key]
+            if future.cancelled():
+                continue
+            try:
+                img = future.result()
+            except Exception as e:
+                # Possibly a transient error, e.g. a file still being written; not marked as
+                # unavailable so the next load_images tries again
+                print(f"Error loading image {image_key}: {e}")
+                if image_key in slots:
+                    slots[image_key].configure(text="Error loading image")
+                continue
+            if img is None:
+                unavailable.add(source_key)
+                if image_key in slots:
+                    slots[image_key].configure(text="No image")
+                continue
+            if image_key in slots:
+                img_tk = ImageTk.PhotoImage(img)
+                img_label = slots.pop(image_key)
+                img_label.configure(image=img_tk, text="")
+                img_label.image = img_tk
+                image_frame.update_idletasks()
+                image_canvas.config(scrollregion=image_canvas.bbox("all"))
+        polling = bool(pending)
+        if polling:
+            root.after(50, show_finished)
 
     root.mainloop()
+    executor.shutdown(wait=False, cancel_futures=True)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,10 @@
 import os
 import sqlite3
+import numpy as np
 import pandas as pd
 import shutil
+import threading
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 
 def parse_measured_values_table(db_path):
@@ -20,9 +23,15 @@ def parse_measured_values_table(db_path):
     conn.close()
     return pd.DataFrame()
 
+def has_image(measured_values_df):
+    """Rows with an image: ImageNr is 0 in the SQLite table and null in the typed Parquet files otherwise."""
+    image_nr = measured_values_df['ImageNr']
+    return image_nr.notna() & (image_nr != 0)
+
+
 def find_closest_temperature(measured_values_df, target_temperature):
     """Find the closest temperature with an available image in the MeasuredValues DataFrame."""
-    measured_values_df = measured_values_df[measured_values_df['ImageNr'] != 0].copy()  # Filter out rows with no image
+    measured_values_df = measured_values_df[has_image(measured_values_df)].copy()  # Filter out rows with no image
     measured_values_df.loc[:, 'TemperatureDiff'] = abs(measured_values_df['Temperature'] - target_temperature)
     closest_row = measured_values_df.loc[measured_values_df['TemperatureDiff'].idxmin()]
     closest_temperature = closest_row['Temperature']
@@ -30,6 +39,127 @@ def find_closest_temperature(measured_values_df, target_temperature):
     return closest_temperature, image_filename
 
 
+def find_closest_temperatures(measured_values_df, target_temperatures):
+    """Find the closest temperatures with an available image for many target temperatures at once."""
+    measured_values_df = measured_values_df[has_image(measured_values_df)]
+    temperatures = measured_values_df['Temperature'].to_numpy(dtype=np.float64)
+    image_filenames = np.array([str(image_nr) for image_nr in measured_values_df['ImageNr']], dtype=np.str_)
+    order = np.argsort(temperatures, kind='stable')
+    return find_all_closest_in_index(temperatures[order], image_filenames[order], target_temperatures)
+
+
+# Sorted Temperature/ImageNr arrays per .dat file, persisted so that a closest-image
+# query does not have to read the MeasuredValues table again.
+INDEX_DIRECTORY = 'temperature_index'
+_temperature_index_cache = {}
+
+
+def build_temperature_index(db_path):
+    """Read all rows with an image from MeasuredValues and return them sorted by temperature."""
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT Temperature, ImageNr FROM MeasuredValues WHERE ImageNr != 0;").fetchall()
+    conn.close()
+
+    temperatures = np.array([row[0] for row in rows], dtype=np.float64)
+    image_filenames = np.array([str(row[1]) for row in rows], dtype=np.str_)
+    # Stable sort keeps the table order for equal temperatures, like idxmin() did
+    order = np.argsort(temperatures, kind='stable')
+    return temperatures[order], image_filenames[order]
+
+
+def get_index_path(db_path):
+    samplename = os.path.basename(os.path.dirname(db_path))
+    db_name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(INDEX_DIRECTORY, f"{samplename}_{db_name}.npz")
+
+
+def load_temperature_index(db_path):
+    """Return the (temperatures, image_filenames) index of a .dat file, rebuilding it when the file changed."""
+    source_mtime = os.stat(db_path).st_mtime_ns
+
+    cached = _temperature_index_cache.get(db_path)
+    if cached is not None and cached[0] == source_mtime:
+        return cached[1], cached[2]
+
+    index_path = get_index_path(db_path)
+    index = None
+    if os.path.exists(index_path):
+        with np.load(index_path) as stored:
+            if int(stored['source_mtime']) == source_mtime:
+                index = stored['temperatures'], stored['image_filenames']
+
+    if index is None:
+        index = build_temperature_index(db_path)
+        os.makedirs(INDEX_DIRECTORY, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, temperatures=index[0], image_filenames=index[1], source_mtime=np.int64(source_mtime))
+        os.replace(tmp_path, index_path)
+
+    _temperature_index_cache[db_path] = (source_mtime, index[0], index[1])
+    return index
+
+
+def find_closest_in_index(temperatures, image_filenames, target_temperature):
+    """Binary search the sorted index for the image closest to the target temperature."""
+    if temperatures.size == 0:
+        return None, None
+
+    pos = np.searchsorted(temperatures, target_temperature)
+    lower = max(pos - 1, 0)
+    upper = min(pos, temperatures.size - 1)
+    if abs(target_temperature - temperatures[lower]) <= abs(temperatures[upper] - target_temperature):
+        idx = lower
+    else:
+        idx = upper
+    return temperatures[idx], str(image_filenames[idx])
+
+
+def find_all_closest_in_index(temperatures, image_filenames, target_temperatures):
+    """Vectorized find_closest_in_index: one searchsorted pass for an array of target temperatures."""
+    target_temperatures = np.asarray(target_temperatures, dtype=np.float64)
+    if temperatures.size == 0:
+        return np.full(target_temperatures.shape, np.nan), np.full(target_temperatures.shape, '', dtype=np.str_)
+
+    pos = np.searchsorted(temperatures, target_temperatures)
+    lower = np.maximum(pos - 1, 0)
+    upper = np.minimum(pos, temperatures.size - 1)
+    use_lower = np.abs(target_temperatures - temperatures[lower]) <= np.abs(temperatures[upper] - target_temperatures)
+    idx = np.where(use_lower, lower, upper)
+    return temperatures[idx], image_filenames[idx]
+
+
+def find_closest_image(db_path, target_temperature):
+    """Find the closest temperature with an available image using the persisted index of the .dat file."""
+    temperatures, image_filenames = load_temperature_index(db_path)
+    return find_closest_in_index(temperatures, image_filenames, target_temperature)
+
+
+def find_closest_images(root_directory, target_temperatures, samplenames=None):
+    """Look up the closest images for an array of target temperatures in one pass per sample.
+
+    Returns a dict {samplename: (folder_path, closest_temperatures, image_filenames)}.
+    """
+    if samplenames is None:
+        samplenames = [folder for folder in os.listdir(root_directory)
+                       if os.path.isdir(os.path.join(root_directory, folder))]
+
+    results = {}
+    for samplename in samplenames:
+        folder_path = os.path.join(root_directory, samplename)
+        if not os.path.isdir(folder_path):
+            print(f"Sample folder '{samplename}' not found in the root directory.")
+            continue
+        for filename in os.listdir(folder_path):
+            if filename.endswith('.dat'):
+                temperatures, image_filenames = load_temperature_index(os.path.join(folder_path, filename))
+                closest_temperatures, closest_filenames = find_all_closest_in_index(
+                    temperatures, image_filenames, target_temperatures)
+                results[samplename] = (folder_path, closest_temperatures, closest_filenames)
+                break  # Assuming one .dat file per sample directory
+    return results
+
+
 def copy_image_to_folder(image_filename, source_folder, target_folder, new_filename, target_format='JPEG'):
     """Copy and convert image to the target folder with a new filename and format."""
     os.makedirs(target_folder, exist_ok=True)
@@ -40,58 +170,92 @@ def copy_image_to_folder(image_filename, source_folder, target_folder, new_filen
     img.save(target_path, format=target_format)
     return target_path
 
-def write_text_to_image(image_path, text):
-    with Image.open(image_path) as img:
-        draw = ImageDraw.Draw(img)
+@lru_cache(maxsize=None)
+def get_font(font_size):
+    """Load the annotation font once per size instead of once per image."""
+    return ImageFont.truetype("TitilliumWeb-Regular.ttf", font_size)  # Use a truetype font
 
-        # Get image dimensions
-        image_width, image_height = img.size
 
-        # Set font size to 10% of the image height
-        font_size = int(image_height * 7.5 / 100)
-        font = ImageFont.truetype("TitilliumWeb-Regular.ttf", font_size)  # Use a truetype font
+def annotate_image(img, text):
+    """Draw white, horizontally centered lines of text near the bottom of a PIL image, in place."""
+    draw = ImageDraw.Draw(img)
 
-        # Split the text into lines
-        lines = text.splitlines()
+    # Get image dimensions
+    image_width, image_height = img.size
 
-        # Calculate the total height of all lines combined
-        total_height = sum(draw.textbbox((0, 0), line, font=font)[3] - draw.textbbox((0, 0), line, font=font)[1] for line in lines)
-        total_height += (len(lines) - 1) * font_size * 0.2  # Include spacing between lines
+    # Set font size to 7.5% of the image height
+    font_size = int(image_height * 7.5 / 100)
+    font = get_font(font_size)
 
-        # Starting y position for the first line (vertically centered)
-        y = image_height - total_height*1.3
+    # Split the text into lines
+    lines = text.splitlines()
 
-        for line in lines:
-            # Get width and height of the current line
-            left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
-            line_width = right - left
-            line_height = bottom - top
+    # Calculate the total height of all lines combined
+    total_height = sum(draw.textbbox((0, 0), line, font=font)[3] - draw.textbbox((0, 0), line, font=font)[1] for line in lines)
+    total_height += (len(lines) - 1) * font_size * 0.2  # Include spacing between lines
 
-            # Calculate the x position (horizontally centered)
-            x = (image_width - line_width) / 2
+    # Starting y position for the first line (vertically centered)
+    y = image_height - total_height*1.3
 
-            # Draw the text line by line
-            draw.text((x, y), line, font=font, fill="white")
+    for line in lines:
+        # Get width and height of the current line
+        left, top, right, bottom = draw.textbbox((0, 0), line, font=font)
+        line_width = right - left
+        line_height = bottom - top
 
-            # Update y position for the next line
-            y += line_height + font_size * 0.2  # Adjust for spacing between lines
+        # Calculate the x position (horizontally centered)
+        x = (image_width - line_width) / 2
 
+        # Draw the text line by line
+        draw.text((x, y), line, font=font, fill="white")
+
+        # Update y position for the next line
+        y += line_height + font_size * 0.2  # Adjust for spacing between lines
+    return img
+
+
+def write_text_to_image(image_path, text):
+    with Image.open(image_path) as img:
+        annotate_image(img, text)
         img.save(image_path)
         #print(f"Added text '{text}' to {image_path}")
 
+
+def render_selected_image(folder_path, image_filename, temp, samplename):
+    """Decode an already looked-up image and return it annotated with temperature and sample, without touching disk."""
+    with Image.open(os.path.join(folder_path, image_filename)) as img:
+        img.load()
+        return annotate_image(img, f"{temp:.0f} °C\n{samplename}")
+
+
+def render_image_at_temperature(root_directory, target_temperature, samplename, as_array=False):
+    """Return the annotated image of a sample closest to the target temperature, or None.
+
+    The image is rendered in memory straight from the TIFF; use export_selected_image to also
+    write it to selected_images/. With as_array the image is returned as a NumPy array.
+    """
+    lookup = find_closest_images(root_directory, [target_temperature], [samplename])
+    if samplename not in lookup:
+        return None
+    folder_path, closest_temps, image_filenames = lookup[samplename]
+    if not image_filenames[0]:
+        return None
+    img = render_selected_image(folder_path, str(image_filenames[0]), closest_temps[0], samplename)
+    return np.asarray(img) if as_array else img
+
+
 def get_closest_image_filepath(root_directory, target_temperature, samplename=None):
     """Get the file path of the closest image based on the target temperature."""
     for dirpath, dirnames, filenames in os.walk(root_directory):
         for filename in filenames:
             if filename.endswith('.dat'):
-                db_path = os.path.join(dirpath, filename)
-                measured_values_df = parse_measured_values_table(db_path)
-                temp, image_filename = find_closest_temperature(measured_values_df, target_temperature)
                 current_samplename = os.path.basename(dirpath)
-
                 if samplename and current_samplename != samplename:
                     continue
 
+                db_path = os.path.join(dirpath, filename)
+                temp, image_filename = find_closest_image(db_path, target_temperature)
+
                 if image_filename:
                     #print(f"Closest temperature: {temp} in folder {current_samplename}")
                     #print(f"Corresponding image filename: {image_filename}")
@@ -104,6 +268,16 @@ def get_closest_image_filepath(root_directory, target_temperature, samplename=No
 import os
 
 
+def export_selected_image(folder_path, image_filename, temp, target_temperature, samplename, target_format='JPEG'):
+    """Annotate an already looked-up image and save it once to selected_images/{target_temperature}/."""
+    target_folder = os.path.join('selected_images', f"{target_temperature:.0f}")
+    os.makedirs(target_folder, exist_ok=True)
+    target_image_path = os.path.join(target_folder, f"{samplename}.{target_format.lower()}")
+    img = render_selected_image(folder_path, image_filename, temp, samplename)
+    img.save(target_image_path, format=target_format)
+    return target_image_path
+
+
 def process_folder(root_directory, target_temperature, samplename=None, force=True, target_format='JPEG'):
     """Process a folder to find and copy the closest image based on the target temperature."""
 
@@ -113,17 +287,15 @@ def process_folder(root_directory, target_temperature, samplename=None, force=Tr
     def process_single_folder(folder_path, target_temperature, samplename, force, target_format):
         for filename in os.listdir(folder_path):
             if filename.endswith('.dat'):
-                db_path = os.path.join(folder_path, filename)
-                measured_values_df = parse_measured_values_table(db_path)
-                temp, image_filename = find_closest_temperature(measured_values_df, target_temperature)
                 current_samplename = os.path.basename(folder_path)
-
                 if samplename and current_samplename != samplename:
                     continue
 
+                db_path = os.path.join(folder_path, filename)
+                temp, image_filename = find_closest_image(db_path, target_temperature)
+
                 if image_filename:
                     target_folder = os.path.join('selected_images', f"{target_temperature:.0f}")
-                    new_filename = f"{current_samplename}.{target_format.lower()}"
                     target_image_path = construct_target_image_path(target_folder, current_samplename, target_format)
 
                     if not force and os.path.exists(target_image_path):
@@ -131,9 +303,8 @@ def process_folder(root_directory, target_temperature, samplename=None, force=Tr
                             f"Image for {current_samplename} at {target_temperature} °C already exists. Skipping processing.")
                         continue
 
-                    target_image_path = copy_image_to_folder(image_filename, folder_path, target_folder, new_filename,
-                                                             target_format)
-                    write_text_to_image(target_image_path, f"{temp:.0f} °C\n{current_samplename}")
+                    export_selected_image(folder_path, image_filename, temp, target_temperature, current_samplename,
+                                          target_format)
                 else:
                     print(f"No available image found for the given temperature in folder {current_samplename}")
 
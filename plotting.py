@@ -1,15 +1,7 @@
 import os
 
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
 from tkinter import BooleanVar, StringVar
 from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from customtkinter import CTk, CTkLabel, CTkOptionMenu, CTkEntry, CTkFrame, CTkScrollbar
-import customtkinter
-
-customtkinter.set_default_color_theme("gui/h2-lab.json")
 
 def get_sample_names():
     sample_names = []
@@ -19,44 +11,32 @@ def get_sample_names():
     return sample_names
 
 
-def calculate_intersections(df, x_column, y_column, hline_y, vline_x):
-    y_intersect = None
-    x_intersect = None
-
-    # Find intersection with horizontal line
-    y_data = df[y_column].values
-    x_data = df[x_column].values
-
-    if np.any(y_data == hline_y):
-        x_intersect = df.loc[y_data == hline_y, x_column].values[0]
-    else:
-        indices = np.where(np.diff(np.sign(y_data - hline_y)))[0]
-        if indices.size > 0:
-            idx = indices[0]
-            x_intersect = np.interp(hline_y, [y_data[idx], y_data[idx + 1]], [x_data[idx], x_data[idx + 1]])
-
-    # Find intersection with vertical line
-    if np.any(x_data == vline_x):
-        y_intersect = df.loc[x_data == vline_x, y_column].values[0]
-    else:
-        indices = np.where(np.diff(np.sign(x_data - vline_x)))[0]
-        if indices.size > 0:
-            idx = indices[0]
-            y_intersect = np.interp(vline_x, [x_data[idx], x_data[idx + 1]], [y_data[idx], y_data[idx + 1]])
+def main():
+    # Only what is needed for the window is imported up front, the plotting and data stack is
+    # imported once the window is on screen (see startup_benchmark.py)
+    from customtkinter import CTk, CTkLabel, CTkOptionMenu, CTkEntry, CTkFrame, CTkScrollbar
+    import customtkinter
+    customtkinter.set_default_color_theme("gui/h2-lab.json")
 
-    return x_intersect, y_intersect
+    root = CTk()
+    root.title("Select Columns")
+    loading_label = CTkLabel(root, text="Loading samples...")
+    loading_label.pack()
+    root.update()
 
+    import matplotlib.pyplot as plt
+    import pyarrow.parquet as pq
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from gui.calculations import calculate_intersections
+    from gui.data_handler import load_columns
 
-def main():
     sample_names = get_sample_names()
 
+    # The column names are in the Parquet metadata, no need to read the data
     parquet_file = f"parquet_data/{sample_names[0]}_MeasuredValues.parquet"
-    df = pd.read_parquet(parquet_file)
-
-    columns = df.columns
+    columns = pq.read_schema(parquet_file).names
 
-    root = CTk()
-    root.title("Select Columns")
+    loading_label.destroy()
 
     # Create frames for layout
     control_frame = CTkFrame(root)
@@ -194,8 +174,7 @@ def main():
 
         for sample, var in experiment_vars.items():
             if var.get():
-                parquet_file = f"parquet_data/{sample}_MeasuredValues.parquet"
-                df = pd.read_parquet(parquet_file)
+                df = load_columns(sample, [x_column, y_column], path="")
                 v_intersect, h_intersect = calculate_intersections(df, x_column, y_column, hline_y, vline_x)
                 ax.plot(df[x_column], df[y_column], label=sample)
 
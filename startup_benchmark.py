@@ -0,0 +1,112 @@
+"""Startup benchmark for the GUI entry points.
+
+With a display, each entry point runs its real main() under python -X importtime until it enters
+the Tk mainloop, which is replaced by a stand-in that draws the window once and exits. The time
+until the first window is mapped on screen and until the mainloop is reached are reported.
+Without a display only the module level is imported. The slowest top-level imports are listed and
+the script exits with status 1 if an entry point needs more than TARGET_SECONDS to its first
+window (to the end of the import without a display) or fails to start.
+"""
+import os
+import re
+import subprocess
+import sys
+
+# Entry points and the directory they are started from
+ENTRY_POINTS = {
+    'plotting.py': '.',
+    'image_viewer.py': '.',
+    'gif-creater.py': '.',
+    'main.py': 'gui',  # Imports its sibling modules by bare name
+}
+TARGET_SECONDS = 1.0
+
+# Runs the entry point as __main__ with the Tk mainloop replaced: the first <Map> event of a root
+# window records when the user first sees something, entering the mainloop records when the
+# window is ready, and the process then exits without waiting for background threads
+BENCHMARK_CODE = """
+import os, runpy, sys, time
+start = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+if os.environ.get('DISPLAY') or sys.platform in ('win32', 'darwin'):
+    import tkinter
+    mapped = []
+    tk_init = tkinter.Tk.__init__
+
+    def init(root, *args, **kwargs):
+        tk_init(root, *args, **kwargs)
+        root.bind('<Map>', lambda event: mapped or mapped.append(time.perf_counter() - start), add='+')
+
+    def mainloop(root, n=0):
+        root.update()
+        ready = time.perf_counter() - start
+        print('RESULT', None, mapped[0] if mapped else ready, ready, flush=True)
+        os._exit(0)
+
+    tkinter.Tk.__init__ = init
+    tkinter.Misc.mainloop = mainloop
+    runpy.run_path({script!r}, run_name='__main__')
+    sys.exit('returned without entering the Tk mainloop')
+runpy.run_path({script!r}, run_name='startup_benchmark')
+print('RESULT', time.perf_counter() - start, None, None)
+"""
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(script, cwd):
+    """Run one entry point under python -X importtime.
+
+    Returns (import seconds, first window seconds, mainloop seconds, imports); the import is only
+    timed without a display and the window times only with one, the others are None.
+    """
+    code = BENCHMARK_CODE.format(script=os.path.basename(script))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=cwd, capture_output=True,
+                            text=True)
+    if result.returncode != 0:
+        errors = "\n".join(line for line in result.stderr.splitlines() if not line.startswith('import time:'))
+        raise RuntimeError(f"{script} failed to start:\n{errors[-2000:]}")
+
+    imports = []
+    for match in IMPORTTIME_LINE.finditer(result.stderr):
+        cumulative, indent, name = int(match.group(2)), len(match.group(3)), match.group(4)
+        if indent == 1:  # Top-level imports only, nested ones are part of their cumulative time
+            imports.append((cumulative / 1e6, name))
+
+    values = [None if value == 'None' else float(value) for value in result.stdout.split('RESULT')[-1].split()]
+    return (*values, sorted(imports, reverse=True))
+
+
+def main():
+    root_directory = os.path.dirname(os.path.abspath(__file__))
+    over_target = []
+    failed = []
+    for script, cwd in ENTRY_POINTS.items():
+        try:
+            import_seconds, window_seconds, ready_seconds, imports = measure(script, os.path.join(root_directory, cwd))
+        except RuntimeError as e:
+            print(e)
+            failed.append(script)
+            continue
+        if window_seconds is None:
+            first_window = import_seconds
+            print(f"{script}: module import {import_seconds:.3f} s, first window n/a (no display)")
+        else:
+            first_window = window_seconds
+            print(f"{script}: first window {window_seconds:.3f} s, mainloop reached {ready_seconds:.3f} s")
+        for seconds, name in imports[:5]:
+            print(f"    {seconds:.3f} s  {name}")
+        if first_window > TARGET_SECONDS:
+            over_target.append(script)
+
+    if over_target:
+        print(f"Over the {TARGET_SECONDS:.1f} s target: {', '.join(over_target)}")
+    if failed:
+        print(f"Failed to start: {', '.join(failed)}")
+    if over_target or failed:
+        sys.exit(1)
+    print(f"All entry points within the {TARGET_SECONDS:.1f} s target.")
+
+
+if __name__ == "__main__":
+    main()